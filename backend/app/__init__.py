@@ -5,7 +5,7 @@ Production-ready Flask REST API for E-commerce Platform
 
 from flask import Flask
 from flask_cors import CORS
-from app.extensions import db, migrate, jwt, ma, limiter
+from app.extensions import db, migrate, jwt, ma, limiter, cache
 from app.config import config
 
 
@@ -22,6 +22,17 @@ def create_app(config_name='development'):
     jwt.init_app(app)
     ma.init_app(app)
     limiter.init_app(app)
+    cache.init_app(app)
+    
+    # Initialize services
+    from app.services import (
+        search_index, fuzzy_search, suggestions, catalog, view_counter
+    )
+    search_index.init_app(app)
+    fuzzy_search.init_app(app)
+    suggestions.init_app(app)
+    catalog.init_app(app)
+    view_counter.init_app(app)
     
     # Enable CORS for React frontend
     CORS(app, resources={
@@ -33,7 +44,8 @@ def create_app(config_name='development'):
                 "https://*.vercel.app"
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "X-Cart-Token"],
+            "expose_headers": ["ETag", "X-Cache", "X-Cart-Token", "X-View-Count"],
             "supports_credentials": True
         }
     })
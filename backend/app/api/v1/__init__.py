@@ -14,3 +14,4 @@ from app.api.v1 import cart
 from app.api.v1 import orders
 from app.api.v1 import users
 from app.api.v1 import admin
+from app.api.v1 import recommendations
@@ -3,15 +3,26 @@ FlaskMarket Enterprise - Admin API
 Admin-only operations for managing products, users, orders
 """
 
-from flask import request, jsonify
+from flask import Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, current_user
 from sqlalchemy import desc, func
 from datetime import datetime, timedelta
 from app.api.v1 import api_v1_bp
 from app.extensions import db
-from app.models import Product, Category, ProductImage, User, Order, Transaction, Coupon
+from app.models import Product, Category, ProductImage, Review, User, Order, Transaction, Coupon
+from app.models.product import product_field_names
+from app.services import (
+    adjust_category_counts, counted_category_ids, link_category, move_category,
+    order_status_changed, view_counter
+)
+from app.signals import category_saved, product_saved, review_saved
 from app.utils.decorators import admin_required
+from app.utils.export import csv_rows, ndjson_rows
+from app.utils.fields import parse_product_fields, product_load_options
+from app.utils.filters import filter_products
 from app.utils.helpers import generate_slug
+from app.utils.pagination import cursor_requested, keyset_paginate
+from app.utils.serializers import serialize_products
 
 
 # ============ Dashboard ============
@@ -72,8 +83,23 @@ def admin_dashboard():
             },
             'order_status_breakdown': dict(order_status_counts),
             'recent_orders': [o.to_dict() for o in recent_orders],
-            'low_stock_products': [p.to_dict() for p in low_stock_products],
-            'top_selling_products': [p.to_dict() for p in top_products]
+            'low_stock_products': serialize_products(low_stock_products),
+            'top_selling_products': serialize_products(top_products)
+        }
+    })
+
+
+@api_v1_bp.route('/admin/metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_metrics():
+    """
+    Get in-process service metrics for this worker
+    """
+    return jsonify({
+        'success': True,
+        'data': {
+            'view_counter': view_counter.stats()
         }
     })
 
@@ -135,6 +161,7 @@ def create_product():
             product.categories.append(category)
     
     db.session.add(product)
+    adjust_category_counts(set(), counted_category_ids(product))
     db.session.commit()
     
     # Add images
@@ -149,6 +176,7 @@ def create_product():
         db.session.add(image)
     
     db.session.commit()
+    product_saved.send(current_app._get_current_object(), product=product)
     
     return jsonify({
         'success': True,
@@ -168,6 +196,7 @@ def update_product(product_id):
     """
     product = Product.query.get_or_404(product_id)
     data = request.get_json()
+    counted = counted_category_ids(product)
     
     # Update fields
     allowed_fields = [
@@ -193,7 +222,9 @@ def update_product(product_id):
             if category:
                 product.categories.append(category)
     
+    adjust_category_counts(counted, counted_category_ids(product))
     db.session.commit()
+    product_saved.send(current_app._get_current_object(), product=product)
     
     return jsonify({
         'success': True,
@@ -214,8 +245,11 @@ def delete_product(product_id):
     product = Product.query.get_or_404(product_id)
     
     # Soft delete
+    counted = counted_category_ids(product)
     product.is_active = False
+    adjust_category_counts(counted, set())
     db.session.commit()
+    product_saved.send(current_app._get_current_object(), product=product)
     
     return jsonify({
         'success': True,
@@ -223,6 +257,46 @@ def delete_product(product_id):
     })
 
 
+@api_v1_bp.route('/admin/products/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def admin_export_products():
+    """
+    Stream the catalog as NDJSON or CSV
+    ---
+    Query Parameters:
+        - format: string (ndjson or csv, default: ndjson)
+        - fields: string (comma-separated product fields, default: listing fields)
+        - Any /products filter (category, search, min_price, max_price, brand,
+          in_stock, featured)
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({
+            'success': False,
+            'message': 'format must be ndjson or csv'
+        }), 400
+    
+    fields = parse_product_fields(request.args)
+    names = list(product_field_names(fields=fields))
+    
+    query, _ = filter_products(request.args)
+    query = query.options(*product_load_options(set(names))).order_by(Product.id)
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    
+    if export_format == 'csv':
+        rows, mimetype = csv_rows(query, names, batch_size), 'text/csv'
+    else:
+        rows, mimetype = ndjson_rows(query, names, batch_size), 'application/x-ndjson'
+    
+    filename = f'catalog-{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.{export_format}'
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 # ============ Category Management ============
 
 @api_v1_bp.route('/admin/categories', methods=['POST'])
@@ -248,18 +322,28 @@ def create_category():
             'message': 'Category with this name already exists'
         }), 409
     
+    parent_id = data.get('parent_id')
+    if parent_id is not None and not db.session.get(Category, parent_id):
+        return jsonify({
+            'success': False,
+            'message': 'Parent category not found'
+        }), 400
+    
     category = Category(
         name=data['name'],
         slug=slug,
         description=data.get('description'),
         image_url=data.get('image_url'),
         icon=data.get('icon'),
-        parent_id=data.get('parent_id'),
+        parent_id=parent_id,
         display_order=data.get('display_order', 0)
     )
     
     db.session.add(category)
+    db.session.flush()
+    link_category(category)
     db.session.commit()
+    category_saved.send(current_app._get_current_object(), category=category)
     
     return jsonify({
         'success': True,
@@ -299,7 +383,25 @@ def update_category(category_id):
     if 'display_order' in data:
         category.display_order = data['display_order']
     
+    if 'parent_id' in data and data['parent_id'] != category.parent_id:
+        parent_id = data['parent_id']
+        if parent_id is not None and not db.session.get(Category, parent_id):
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': 'Parent category not found'
+            }), 400
+        try:
+            move_category(category, parent_id)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+    
     db.session.commit()
+    category_saved.send(current_app._get_current_object(), category=category)
     
     return jsonify({
         'success': True,
@@ -310,6 +412,68 @@ def update_category(category_id):
     })
 
 
+# ============ Review Moderation ============
+
+@api_v1_bp.route('/admin/reviews/<int:review_id>/moderate', methods=['PUT'])
+@jwt_required()
+@admin_required
+def moderate_review(review_id):
+    """
+    Approve or reject a review
+    ---
+    Request Body:
+        - is_approved: boolean (required)
+    """
+    review = Review.query.get_or_404(review_id)
+    data = request.get_json()
+    
+    is_approved = data.get('is_approved')
+    if not isinstance(is_approved, bool):
+        return jsonify({
+            'success': False,
+            'message': 'is_approved must be true or false'
+        }), 400
+    
+    # Keep the product's rating aggregates in the same transaction
+    if is_approved != review.is_approved:
+        review.product.apply_rating(review.rating, 1 if is_approved else -1)
+        review.is_approved = is_approved
+    
+    db.session.commit()
+    review_saved.send(current_app._get_current_object(), product=review.product)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Review approved' if is_approved else 'Review rejected',
+        'data': {
+            'review': review.to_dict()
+        }
+    })
+
+
+@api_v1_bp.route('/admin/reviews/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_review(review_id):
+    """
+    Delete a review
+    """
+    review = Review.query.get_or_404(review_id)
+    
+    product = review.product
+    if review.is_approved:
+        product.apply_rating(review.rating, -1)
+    
+    db.session.delete(review)
+    db.session.commit()
+    review_saved.send(current_app._get_current_object(), product=product)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Review deleted successfully'
+    })
+
+
 # ============ Order Management ============
 
 @api_v1_bp.route('/admin/orders', methods=['GET'])
@@ -318,9 +482,16 @@ def update_category(category_id):
 def admin_get_orders():
     """
     Get all orders with filters
+    ---
+    Query Parameters:
+        - page: int (default: 1)
+        - per_page: int (default: 20)
+        - status: string
+        - cursor: string (opt-in keyset pagination; empty for the first page)
+        - include_total: boolean (cursor mode only, default: false)
     """
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
     status = request.args.get('status')
     
     query = Order.query
@@ -328,6 +499,21 @@ def admin_get_orders():
     if status:
         query = query.filter(Order.status == status)
     
+    if cursor_requested(request.args):
+        keyset_page = keyset_paginate(
+            query, Order.created_at, Order.id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('include_total') == 'true'
+        )
+        return jsonify({
+            'success': True,
+            'data': {
+                'orders': [o.to_dict(include_items=True) for o in keyset_page.items],
+                'pagination': keyset_page.to_dict()
+            }
+        })
+    
     pagination = query.order_by(desc(Order.created_at)).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -364,7 +550,9 @@ def update_order_status(order_id):
             'message': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'
         }), 400
     
+    previous_status = order.status
     order.status = new_status
+    order_status_changed(order, previous_status)
     
     if new_status == 'shipped':
         order.shipped_at = datetime.utcnow()
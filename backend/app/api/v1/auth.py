@@ -13,6 +13,7 @@ from datetime import datetime
 from app.api.v1 import api_v1_bp
 from app.extensions import db, limiter
 from app.models import User
+from app.services import guest_carts
 
 
 # Token blacklist (in production, use Redis)
@@ -77,6 +78,9 @@ def register():
         db.session.add(user)
         db.session.commit()
         
+        # Carry over anything added to a guest cart before signing up
+        guest_carts.merge(guest_carts.request_token(), user.id)
+        
         # Generate tokens
         access_token = create_access_token(identity=user)
         refresh_token = create_refresh_token(identity=user)
@@ -109,6 +113,7 @@ def login():
     Request Body:
         - username: string (username or email)
         - password: string
+        - cart_token: string (optional; guest cart to merge, also read from X-Cart-Token)
     """
     data = request.get_json()
     
@@ -142,6 +147,9 @@ def login():
     user.last_login = datetime.utcnow()
     db.session.commit()
     
+    # Fold the guest cart (X-Cart-Token) into the account's cart
+    guest_carts.merge(guest_carts.request_token(), user.id)
+    
     # Generate tokens
     access_token = create_access_token(identity=user)
     refresh_token = create_refresh_token(identity=user)
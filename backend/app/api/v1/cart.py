@@ -1,43 +1,121 @@
 """
 FlaskMarket Enterprise - Cart API
 Shopping cart operations
+Signed-in shoppers use CartItem rows; anonymous shoppers get a guest cart
+identified by the X-Cart-Token header (returned by the first write), which
+is merged into their account on login.
 """
 
-from flask import request, jsonify
+from flask import abort, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
 from app.api.v1 import api_v1_bp
 from app.extensions import db
 from app.models import CartItem, Product
+from app.services import basket_prices, cart_lines, guest_carts, price_basket
+from app.services.guest_carts import TOKEN_HEADER
+from app.utils.fields import parse_product_fields, product_load_options
+from app.utils.serializers import serialize_cart_items, serialize_products
+
+
+CART_BATCH_OPS = ('add', 'update', 'remove')
+
+
+def cart_count(user_id):
+    """Total quantity in a user's cart, as one SUM query"""
+    return db.session.query(
+        func.coalesce(func.sum(CartItem.quantity), 0)
+    ).filter(CartItem.user_id == user_id).scalar()
+
+
+def _guest_response(body, token, status=200):
+    """JSON response carrying the guest cart token in the body and header"""
+    body.setdefault('data', {})['cart_token'] = token
+    response = jsonify(body)
+    response.headers[TOKEN_HEADER] = token
+    return response, status
+
+
+def _guest_items(lines, fields=None):
+    """Serialized lines and the (product_id, price, quantity) pricing lines of a guest cart"""
+    products = {
+        product.id: product
+        for product in Product.query.options(*product_load_options(fields, 'price')).filter(
+            Product.id.in_(list(lines))
+        )
+    } if lines else {}
+    product_ids = [product_id for product_id in lines if product_id in products]
+    product_data = serialize_products([products[product_id] for product_id in product_ids], fields=fields)
+    
+    items = [
+        {
+            'id': product_id,
+            'product': data,
+            'quantity': lines[product_id],
+            'subtotal': products[product_id].price * lines[product_id],
+            'created_at': None
+        }
+        for product_id, data in zip(product_ids, product_data)
+    ]
+    pricing = [(product_id, products[product_id].price, lines[product_id]) for product_id in product_ids]
+    return items, pricing
+
+
+def _is_int(value):
+    """A JSON integer; bool is an int subclass, so true/false are ruled out"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _guest_cart_full(lines):
+    return len(lines) > current_app.config['GUEST_CART_MAX_LINES']
 
 
 @api_v1_bp.route('/cart', methods=['GET'])
-@jwt_required()
+@jwt_required(optional=True)
 def get_cart():
     """
     Get user's shopping cart
+    ---
+    Query Parameters:
+        - fields: string (comma-separated product fields to return per item)
+    
+    Items and their products come from one joined query; the product
+    categories (when returned) take one more. Guest item ids are product ids.
     """
-    cart_items = current_user.cart_items.all()
+    fields = parse_product_fields(request.args)
+    
+    if not current_user:
+        items, lines = _guest_items(guest_carts.get(guest_carts.request_token()), fields)
+        return jsonify({
+            'success': True,
+            'data': {
+                'items': items,
+                'summary': price_basket(lines).summary()
+            }
+        })
     
-    subtotal = sum(item.subtotal for item in cart_items)
-    item_count = sum(item.quantity for item in cart_items)
+    cart_items = CartItem.query.options(
+        joinedload(CartItem.product).options(*product_load_options(fields, 'price'))
+    ).filter(
+        CartItem.user_id == current_user.id
+    ).order_by(CartItem.id).all()
+    
+    quote = price_basket(
+        (item.product_id, item.product.price, item.quantity) for item in cart_items
+    )
     
     return jsonify({
         'success': True,
         'data': {
-            'items': [item.to_dict() for item in cart_items],
-            'summary': {
-                'item_count': item_count,
-                'subtotal': subtotal,
-                'shipping': 0 if subtotal >= 500 else 50,  # Free shipping over $500
-                'tax': round(subtotal * 0.18, 2),  # 18% GST
-                'total': round(subtotal + (0 if subtotal >= 500 else 50) + (subtotal * 0.18), 2)
-            }
+            'items': serialize_cart_items(cart_items, fields=fields),
+            'summary': quote.summary()
         }
     })
 
 
 @api_v1_bp.route('/cart/add', methods=['POST'])
-@jwt_required()
+@jwt_required(optional=True)
 def add_to_cart():
     """
     Add item to cart
@@ -78,6 +156,39 @@ def add_to_cart():
             'message': f'Only {product.stock_quantity} items available in stock'
         }), 400
     
+    if not current_user:
+        token = guest_carts.request_token() or guest_carts.new_token()
+        lines = guest_carts.get(token)
+        new_quantity = lines.get(product.id, 0) + quantity
+        if product.track_inventory and product.stock_quantity < new_quantity:
+            return jsonify({
+                'success': False,
+                'message': f'Cannot add more. Only {product.stock_quantity} items available'
+            }), 400
+        
+        lines[product.id] = new_quantity
+        if _guest_cart_full(lines):
+            return jsonify({
+                'success': False,
+                'message': 'Cart is full'
+            }), 400
+        guest_carts.save(token, lines)
+        
+        return _guest_response({
+            'success': True,
+            'message': f'{product.name} added to cart',
+            'data': {
+                'cart_item': {
+                    'id': product.id,
+                    'product': product.to_dict(),
+                    'quantity': new_quantity,
+                    'subtotal': product.price * new_quantity,
+                    'created_at': None
+                },
+                'cart_count': sum(lines.values())
+            }
+        }, token)
+    
     # Check if item already in cart
     cart_item = CartItem.query.filter_by(
         user_id=current_user.id, product_id=product_id
@@ -104,21 +215,184 @@ def add_to_cart():
     
     db.session.commit()
     
-    # Get updated cart count
-    cart_count = sum(item.quantity for item in current_user.cart_items)
-    
     return jsonify({
         'success': True,
         'message': f'{product.name} added to cart',
         'data': {
             'cart_item': cart_item.to_dict(),
-            'cart_count': cart_count
+            'cart_count': cart_count(current_user.id)
+        }
+    })
+
+
+@api_v1_bp.route('/cart/batch', methods=['POST'])
+@jwt_required(optional=True)
+def batch_update_cart():
+    """
+    Apply many cart changes at once
+    ---
+    Request Body:
+        - operations: list of {op, product_id, quantity}
+            - add: increase quantity (default 1)
+            - update: set quantity (0 removes)
+            - remove: drop the product from the cart
+    
+    Operations apply in order. Products and existing cart lines are read
+    with one IN query each, and everything is committed together: if any
+    resulting line is invalid (unknown or inactive product, not enough
+    stock), nothing changes.
+    """
+    data = request.get_json() or {}
+    operations = data.get('operations')
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({
+            'success': False,
+            'message': 'operations must be a non-empty list'
+        }), 400
+    
+    max_operations = current_app.config['CART_BATCH_MAX']
+    if len(operations) > max_operations:
+        return jsonify({
+            'success': False,
+            'message': f'At most {max_operations} operations per request'
+        }), 400
+    
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in CART_BATCH_OPS:
+            return jsonify({
+                'success': False,
+                'message': f'Operation {index}: op must be one of {", ".join(CART_BATCH_OPS)}'
+            }), 400
+        if not _is_int(operation.get('product_id')):
+            return jsonify({
+                'success': False,
+                'message': f'Operation {index}: product_id is required'
+            }), 400
+        quantity = operation.get('quantity', 1 if operation['op'] == 'add' else None)
+        if operation['op'] != 'remove' and (
+            not _is_int(quantity) or quantity < (1 if operation['op'] == 'add' else 0)
+        ):
+            return jsonify({
+                'success': False,
+                'message': f'Operation {index}: invalid quantity'
+            }), 400
+    
+    product_ids = {operation['product_id'] for operation in operations}
+    products = {
+        product.id: product
+        for product in Product.query.options(load_only(
+            Product.id, Product.name, Product.is_active, Product.track_inventory, Product.stock_quantity
+        )).filter(Product.id.in_(product_ids))
+    }
+    if not current_user:
+        token = guest_carts.request_token() or guest_carts.new_token()
+        guest_lines = guest_carts.get(token)
+        quantities = {
+            product_id: quantity for product_id, quantity in guest_lines.items() if product_id in product_ids
+        }
+    else:
+        cart_items = {
+            item.product_id: item
+            for item in CartItem.query.filter(
+                CartItem.user_id == current_user.id, CartItem.product_id.in_(product_ids)
+            )
+        }
+        quantities = {product_id: item.quantity for product_id, item in cart_items.items()}
+    
+    # Fold the operations into a target quantity per product
+    for operation in operations:
+        product_id = operation['product_id']
+        if operation['op'] == 'add':
+            quantities[product_id] = quantities.get(product_id, 0) + operation.get('quantity', 1)
+        elif operation['op'] == 'update':
+            quantities[product_id] = operation['quantity']
+        else:
+            quantities[product_id] = 0
+    
+    errors = []
+    for product_id, quantity in quantities.items():
+        if quantity == 0:
+            continue
+        product = products.get(product_id)
+        if product is None:
+            errors.append({'product_id': product_id, 'message': 'Product not found'})
+        elif not product.is_active:
+            errors.append({'product_id': product_id, 'message': f'{product.name} is not available'})
+        elif product.track_inventory and product.stock_quantity < quantity:
+            errors.append({
+                'product_id': product_id,
+                'message': f'Only {product.stock_quantity} of {product.name} available in stock'
+            })
+    
+    if errors:
+        return jsonify({
+            'success': False,
+            'message': errors[0]['message'],
+            'errors': errors
+        }), 400
+    
+    changed = [
+        {'product_id': product_id, 'quantity': quantity}
+        for product_id, quantity in quantities.items()
+    ]
+    
+    if not current_user:
+        guest_lines.update(quantities)
+        guest_lines = {product_id: quantity for product_id, quantity in guest_lines.items() if quantity}
+        if _guest_cart_full(guest_lines):
+            return jsonify({
+                'success': False,
+                'message': 'Cart is full'
+            }), 400
+        guest_carts.save(token, guest_lines)
+        
+        prices = basket_prices(guest_lines)
+        quote = price_basket(
+            (product_id, prices[product_id], quantity)
+            for product_id, quantity in guest_lines.items() if product_id in prices
+        )
+        return _guest_response({
+            'success': True,
+            'message': 'Cart updated',
+            'data': {
+                'items': changed,
+                'cart_count': quote.item_count,
+                'summary': quote.summary()
+            }
+        }, token)
+    
+    for product_id, quantity in quantities.items():
+        cart_item = cart_items.get(product_id)
+        if quantity == 0:
+            if cart_item:
+                db.session.delete(cart_item)
+        elif cart_item:
+            cart_item.quantity = quantity
+        else:
+            db.session.add(CartItem(
+                user_id=current_user.id,
+                product_id=product_id,
+                quantity=quantity
+            ))
+    
+    db.session.commit()
+    
+    quote = price_basket(cart_lines(current_user.id))
+    
+    return jsonify({
+        'success': True,
+        'message': 'Cart updated',
+        'data': {
+            'items': changed,
+            'cart_count': quote.item_count,
+            'summary': quote.summary()
         }
     })
 
 
 @api_v1_bp.route('/cart/update/<int:item_id>', methods=['PUT'])
-@jwt_required()
+@jwt_required(optional=True)
 def update_cart_item(item_id):
     """
     Update cart item quantity
@@ -126,10 +400,6 @@ def update_cart_item(item_id):
     Request Body:
         - quantity: int (required)
     """
-    cart_item = CartItem.query.filter_by(
-        id=item_id, user_id=current_user.id
-    ).first_or_404()
-    
     data = request.get_json()
     quantity = data.get('quantity')
     
@@ -139,6 +409,46 @@ def update_cart_item(item_id):
             'message': 'Valid quantity is required'
         }), 400
     
+    if not current_user:
+        token = guest_carts.request_token()
+        lines = guest_carts.get(token)
+        if item_id not in lines:
+            abort(404)
+        
+        product = db.session.get(Product, item_id)
+        if product is None:
+            abort(404)
+        if quantity and product.track_inventory and product.stock_quantity < quantity:
+            return jsonify({
+                'success': False,
+                'message': f'Only {product.stock_quantity} items available'
+            }), 400
+        
+        lines[item_id] = quantity
+        guest_carts.save(token, lines)
+        if quantity == 0:
+            return _guest_response({
+                'success': True,
+                'message': 'Item removed from cart'
+            }, token)
+        return _guest_response({
+            'success': True,
+            'message': 'Cart updated',
+            'data': {
+                'cart_item': {
+                    'id': product.id,
+                    'product': product.to_dict(),
+                    'quantity': quantity,
+                    'subtotal': product.price * quantity,
+                    'created_at': None
+                }
+            }
+        }, token)
+    
+    cart_item = CartItem.query.options(joinedload(CartItem.product)).filter_by(
+        id=item_id, user_id=current_user.id
+    ).first_or_404()
+    
     if quantity == 0:
         # Remove item
         db.session.delete(cart_item)
@@ -169,11 +479,23 @@ def update_cart_item(item_id):
 
 
 @api_v1_bp.route('/cart/remove/<int:item_id>', methods=['DELETE'])
-@jwt_required()
+@jwt_required(optional=True)
 def remove_from_cart(item_id):
     """
     Remove item from cart
     """
+    if not current_user:
+        token = guest_carts.request_token()
+        lines = guest_carts.get(token)
+        if lines.pop(item_id, None) is None:
+            abort(404)
+        guest_carts.save(token, lines)
+        product = db.session.get(Product, item_id)
+        return _guest_response({
+            'success': True,
+            'message': f'{product.name} removed from cart' if product else 'Item removed from cart'
+        }, token)
+    
     cart_item = CartItem.query.filter_by(
         id=item_id, user_id=current_user.id
     ).first_or_404()
@@ -190,11 +512,18 @@ def remove_from_cart(item_id):
 
 
 @api_v1_bp.route('/cart/clear', methods=['DELETE'])
-@jwt_required()
+@jwt_required(optional=True)
 def clear_cart():
     """
     Clear entire cart
     """
+    if not current_user:
+        guest_carts.clear(guest_carts.request_token())
+        return jsonify({
+            'success': True,
+            'message': 'Cart cleared'
+        })
+    
     CartItem.query.filter_by(user_id=current_user.id).delete()
     db.session.commit()
     
@@ -205,12 +534,15 @@ def clear_cart():
 
 
 @api_v1_bp.route('/cart/count', methods=['GET'])
-@jwt_required()
+@jwt_required(optional=True)
 def get_cart_count():
     """
     Get cart item count (for header badge)
     """
-    count = sum(item.quantity for item in current_user.cart_items)
+    if not current_user:
+        count = sum(guest_carts.get(guest_carts.request_token()).values())
+    else:
+        count = cart_count(current_user.id)
     
     return jsonify({
         'success': True,
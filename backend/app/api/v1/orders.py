@@ -3,12 +3,18 @@ FlaskMarket Enterprise - Orders API
 Order creation, checkout, and order management
 """
 
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
 from app.api.v1 import api_v1_bp
 from app.extensions import db
 from app.models import Order, OrderItem, CartItem, Transaction, Coupon
+from app.services import cart_lines, coupon_error, order_status_changed, price_basket
+from app.signals import inventory_changed
+from app.utils.etags import is_fresh, not_modified, order_etag, with_etag
+from app.utils.fields import order_load_options, parse_order_fields
+from app.utils.pagination import cursor_requested, keyset_paginate
 
 
 @api_v1_bp.route('/orders', methods=['GET'])
@@ -16,16 +22,40 @@ from app.models import Order, OrderItem, CartItem, Transaction, Coupon
 def get_orders():
     """
     Get user's orders
+    ---
+    Query Parameters:
+        - page: int (default: 1)
+        - per_page: int (default: 10)
+        - status: string
+        - cursor: string (opt-in keyset pagination; empty for the first page)
+        - include_total: boolean (cursor mode only, default: false)
+        - fields: string (comma-separated order fields to return)
     """
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = max(min(request.args.get('per_page', 10, type=int), 100), 1)
     status = request.args.get('status')
+    fields = parse_order_fields(request.args)
     
-    query = current_user.orders
+    query = current_user.orders.options(*order_load_options(fields, 'created_at'))
     
     if status:
         query = query.filter(Order.status == status)
     
+    if cursor_requested(request.args):
+        keyset_page = keyset_paginate(
+            query, Order.created_at, Order.id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('include_total') == 'true'
+        )
+        return jsonify({
+            'success': True,
+            'data': {
+                'orders': [order.to_dict(fields=fields) for order in keyset_page.items],
+                'pagination': keyset_page.to_dict()
+            }
+        })
+    
     pagination = query.order_by(desc(Order.created_at)).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -33,7 +63,7 @@ def get_orders():
     return jsonify({
         'success': True,
         'data': {
-            'orders': [order.to_dict() for order in pagination.items],
+            'orders': [order.to_dict(fields=fields) for order in pagination.items],
             'pagination': {
                 'page': pagination.page,
                 'total_pages': pagination.pages,
@@ -49,16 +79,21 @@ def get_order(order_id):
     """
     Get single order details
     """
+    fields = parse_order_fields(request.args)
     order = Order.query.filter_by(
         id=order_id, user_id=current_user.id
     ).first_or_404()
+    etag = order_etag(order, fields)
     
-    return jsonify({
+    if is_fresh(etag):
+        return not_modified(etag)
+    
+    return with_etag(jsonify({
         'success': True,
         'data': {
-            'order': order.to_dict(include_items=True)
+            'order': order.to_dict(include_items=True, fields=fields)
         }
-    })
+    }), etag)
 
 
 @api_v1_bp.route('/orders/checkout', methods=['POST'])
@@ -76,7 +111,9 @@ def checkout():
     data = request.get_json()
     
     # Get cart items
-    cart_items = current_user.cart_items.all()
+    cart_items = CartItem.query.options(joinedload(CartItem.product)).filter(
+        CartItem.user_id == current_user.id
+    ).order_by(CartItem.id).all()
     
     if not cart_items:
         return jsonify({
@@ -101,27 +138,29 @@ def checkout():
             }), 400
     
     # Calculate totals
-    subtotal = sum(item.subtotal for item in cart_items)
-    shipping_cost = 0 if subtotal >= 500 else 50
-    tax_amount = round(subtotal * 0.18, 2)  # 18% GST
-    discount_amount = 0
+    quote = price_basket(
+        (item.product_id, item.product.price, item.quantity) for item in cart_items
+    )
     
     # Apply coupon if provided
     coupon_code = data.get('coupon_code')
     if coupon_code:
         coupon = Coupon.query.filter_by(code=coupon_code.upper()).first()
         if coupon:
-            is_valid, message = coupon.is_valid()
-            if is_valid:
-                discount_amount = coupon.calculate_discount(subtotal)
-                coupon.used_count += 1
-            else:
+            message = coupon_error(coupon, quote.subtotal)
+            if message:
                 return jsonify({
                     'success': False,
                     'message': message
                 }), 400
+            quote.apply_coupon(coupon)
+            coupon.used_count += 1
     
-    total_amount = subtotal - discount_amount + shipping_cost + tax_amount
+    subtotal = quote.subtotal
+    discount_amount = quote.discount
+    shipping_cost = quote.shipping
+    tax_amount = quote.tax
+    total_amount = quote.total
     
     # Check wallet balance
     if data.get('payment_method', 'wallet') == 'wallet':
@@ -151,8 +190,10 @@ def checkout():
         db.session.add(order)
         
         # Create order items
+        purchased_products = []
         for cart_item in cart_items:
             product = cart_item.product
+            purchased_products.append(product)
             
             # Check stock again
             if product.track_inventory and product.stock_quantity < cart_item.quantity:
@@ -200,6 +241,7 @@ def checkout():
         CartItem.query.filter_by(user_id=current_user.id).delete()
         
         db.session.commit()
+        inventory_changed.send(current_app._get_current_object(), products=purchased_products)
         
         return jsonify({
             'success': True,
@@ -262,10 +304,16 @@ def cancel_order(order_id):
         db.session.add(transaction)
         
         # Update order status
+        previous_status = order.status
         order.status = 'cancelled'
         order.payment_status = 'refunded'
+        order_status_changed(order, previous_status)
         
         db.session.commit()
+        inventory_changed.send(
+            current_app._get_current_object(),
+            products=[item.product for item in order.items if item.product]
+        )
         
         return jsonify({
             'success': True,
@@ -309,31 +357,25 @@ def validate_coupon():
             'message': 'Invalid coupon code'
         }), 404
     
-    is_valid, message = coupon.is_valid()
+    # Price the cart from one joined query
+    quote = price_basket(cart_lines(current_user.id))
+    message = coupon_error(coupon, quote.subtotal)
     
-    if not is_valid:
+    if message:
         return jsonify({
             'success': False,
             'message': message
         }), 400
     
-    # Calculate discount based on cart
-    cart_subtotal = sum(item.subtotal for item in current_user.cart_items)
-    
-    if cart_subtotal < coupon.min_order_amount:
-        return jsonify({
-            'success': False,
-            'message': f'Minimum order amount is ${coupon.min_order_amount}'
-        }), 400
-    
-    discount = coupon.calculate_discount(cart_subtotal)
+    quote.apply_coupon(coupon)
     
     return jsonify({
         'success': True,
         'message': 'Coupon applied successfully',
         'data': {
             'coupon': coupon.to_dict(),
-            'discount_amount': discount
+            'discount_amount': quote.discount,
+            'summary': quote.summary()
         }
     })
 
@@ -343,11 +385,34 @@ def validate_coupon():
 def get_transactions():
     """
     Get user's transaction history
+    ---
+    Query Parameters:
+        - page: int (default: 1)
+        - per_page: int (default: 20)
+        - cursor: string (opt-in keyset pagination; empty for the first page)
+        - include_total: boolean (cursor mode only, default: false)
     """
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+    
+    query = Transaction.query.filter_by(user_id=current_user.id)
+    
+    if cursor_requested(request.args):
+        keyset_page = keyset_paginate(
+            query, Transaction.created_at, Transaction.id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('include_total') == 'true'
+        )
+        return jsonify({
+            'success': True,
+            'data': {
+                'transactions': [t.to_dict() for t in keyset_page.items],
+                'pagination': keyset_page.to_dict()
+            }
+        })
     
-    pagination = Transaction.query.filter_by(user_id=current_user.id).order_by(
+    pagination = query.order_by(
         desc(Transaction.created_at)
     ).paginate(page=page, per_page=per_page, error_out=False)
     
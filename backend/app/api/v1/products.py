@@ -3,16 +3,44 @@ FlaskMarket Enterprise - Products API
 CRUD operations for products with filtering, searching, and pagination
 """
 
-from flask import request, jsonify
+from collections import defaultdict
+from math import ceil
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
-from sqlalchemy import or_, desc, asc
+from sqlalchemy import Integer, desc, asc, case, cast, func, select, true
+from sqlalchemy.orm import joinedload
 from app.api.v1 import api_v1_bp
 from app.extensions import db
-from app.models import Product, Category, Review, WishlistItem
+from app.models import Product, Category, Review, User, WishlistItem
+from app.models.product import product_categories
+from app.services import (
+    catalog, category_subtree, fetch_products, related_product_ids, suggestions, view_counter
+)
+from app.signals import review_saved
+from app.utils.cache import cached_response
 from app.utils.decorators import admin_required
+from app.utils.etags import (
+    VIEW_COUNT_HEADER, is_fresh, not_modified, product_etag, with_etag
+)
+from app.utils.fields import parse_product_fields, product_load_options
+from app.utils.filters import filter_products
+from app.utils.helpers import calculate_pagination
+from app.utils.pagination import cursor_requested, keyset_paginate
+from app.utils.serializers import serialize_categories, serialize_category_tree, serialize_products
+
+
+# Sort option -> (column, descending)
+PRODUCT_SORT_KEYS = {
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'popular': (Product.sold_count, True),
+    'rating': (Product.rating_average, True),
+    'newest': (Product.created_at, True)
+}
 
 
 @api_v1_bp.route('/products', methods=['GET'])
+@cached_response('products')
 def get_products():
     """
     Get all products with filtering, searching, and pagination
@@ -22,181 +50,465 @@ def get_products():
         - per_page: int (default: 12, max: 100)
         - category: string (category slug)
         - search: string (search query)
+        - fuzzy: boolean (typo-tolerant search, default: false)
         - min_price: float
         - max_price: float
         - brand: string
-        - sort: string (price_asc, price_desc, newest, popular, rating)
+        - sort: string (relevance, price_asc, price_desc, newest, popular, rating)
+                default: relevance when searching, newest otherwise
         - in_stock: boolean
         - featured: boolean
+        - cursor: string (opt-in keyset pagination; empty for the first page)
+        - include_total: boolean (cursor mode only, default: false)
+        - fields: string (comma-separated product fields to return)
     """
-    page = request.args.get('page', 1, type=int)
-    per_page = min(request.args.get('per_page', 12, type=int), 100)
-    
-    # Build query
-    query = Product.query.filter(Product.is_active == True)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(min(request.args.get('per_page', 12, type=int), 100), 1)
+    fields = parse_product_fields(request.args)
     
-    # Filter by category
-    category_slug = request.args.get('category')
-    if category_slug:
-        category = Category.query.filter_by(slug=category_slug).first()
-        if category:
-            query = query.filter(Product.categories.contains(category))
-    
-    # Search
     search = request.args.get('search', '').strip()
-    if search:
-        search_term = f'%{search}%'
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.brand.ilike(search_term),
-                Product.sku.ilike(search_term)
-            )
+    sort = request.args.get('sort', 'relevance' if search else 'newest')
+    
+    # Plain filtered listings are answered from the in-memory catalog
+    if not cursor_requested(request.args):
+        result = catalog.query(request.args, sort, page, per_page)
+        if result is not None:
+            product_ids, total = result
+            return jsonify({
+                'success': True,
+                'data': {
+                    'products': serialize_products(
+                        fetch_products(product_ids, product_load_options(fields)), fields=fields
+                    ),
+                    'pagination': calculate_pagination(page, per_page, total)
+                }
+            })
+    
+    # Build query
+    query, relevance = filter_products(request.args)
+    
+    # Keyset pagination: seek on the sort key plus id, no OFFSET
+    if cursor_requested(request.args):
+        if sort == 'relevance' and relevance is not None:
+            return jsonify({
+                'success': False,
+                'message': 'Cursor pagination is not available for relevance sort'
+            }), 400
+        
+        order_column, descending = PRODUCT_SORT_KEYS.get(sort, PRODUCT_SORT_KEYS['newest'])
+        keyset_page = keyset_paginate(
+            query.options(*product_load_options(fields, order_column.key)), order_column, Product.id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            descending=descending,
+            include_total=request.args.get('include_total') == 'true'
         )
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'products': serialize_products(keyset_page.items, fields=fields),
+                'pagination': keyset_page.to_dict()
+            }
+        })
     
-    # Price range
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
-    
-    # Brand filter
-    brand = request.args.get('brand')
-    if brand:
-        query = query.filter(Product.brand.ilike(f'%{brand}%'))
-    
-    # Stock filter
-    in_stock = request.args.get('in_stock')
-    if in_stock == 'true':
-        query = query.filter(Product.stock_quantity > 0)
-    
-    # Featured filter
-    featured = request.args.get('featured')
-    if featured == 'true':
-        query = query.filter(Product.is_featured == True)
-    
-    # Sorting
-    sort = request.args.get('sort', 'newest')
-    if sort == 'price_asc':
-        query = query.order_by(asc(Product.price))
-    elif sort == 'price_desc':
-        query = query.order_by(desc(Product.price))
-    elif sort == 'popular':
-        query = query.order_by(desc(Product.sold_count))
-    elif sort == 'rating':
-        query = query.order_by(desc(Product.view_count))  # Placeholder
-    else:  # newest
-        query = query.order_by(desc(Product.created_at))
+    if sort == 'relevance' and relevance is not None:
+        query = query.order_by(relevance, desc(Product.id))
+    else:
+        order_column, descending = PRODUCT_SORT_KEYS.get(sort, PRODUCT_SORT_KEYS['newest'])
+        direction = desc if descending else asc
+        query = query.order_by(direction(order_column), direction(Product.id))
     
     # Paginate
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination = query.options(*product_load_options(fields)).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
     
     return jsonify({
         'success': True,
         'data': {
-            'products': [p.to_dict() for p in pagination.items],
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
+            'products': serialize_products(pagination.items, fields=fields),
+            # Same shape as the catalog path above
+            'pagination': calculate_pagination(pagination.page, pagination.per_page, pagination.total)
+        }
+    })
+
+
+@api_v1_bp.route('/products/suggest', methods=['GET'])
+def suggest_products():
+    """
+    Autocomplete product names, brands and categories for a prefix
+    ---
+    Query Parameters:
+        - q: string (prefix typed so far)
+        - limit: int (per kind, default: 5, max: 20)
+    """
+    prefix = request.args.get('q', '').strip()
+    limit = max(min(request.args.get('limit', current_app.config['SUGGEST_LIMIT'], type=int), 20), 1)
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'query': prefix,
+            'suggestions': suggestions.suggest(prefix, limit)
+        }
+    })
+
+
+@api_v1_bp.route('/products/facets', methods=['GET'])
+@cached_response('products')
+def get_product_facets():
+    """
+    Get filter facet counts for the current product filters
+    ---
+    Query Parameters:
+        Same filters as GET /products (category, search, min_price,
+        max_price, brand, in_stock, featured)
+    
+    Counts come from two grouped queries: one over
+    (brand, price bucket, stock state) rolled up in Python, and one over
+    category membership.
+    """
+    query, _ = filter_products(request.args)
+    product_ids = query.order_by(None).with_entities(Product.id).subquery()
+    
+    boundaries = current_app.config['PRICE_FACET_BOUNDARIES']
+    price_bucket = case(
+        *[(Product.price < bound, index) for index, bound in enumerate(boundaries)],
+        else_=len(boundaries)
+    )
+    in_stock = case((Product.in_stock, 1), else_=0)
+    
+    rows = db.session.query(
+        Product.brand, price_bucket, in_stock, func.count(Product.id)
+    ).filter(
+        Product.id.in_(select(product_ids.c.id))
+    ).group_by(Product.brand, price_bucket, in_stock).all()
+    
+    total = 0
+    brands = defaultdict(int)
+    buckets = defaultdict(int)
+    availability = {'in_stock': 0, 'out_of_stock': 0}
+    for brand, bucket, stocked, count in rows:
+        total += count
+        if brand:
+            brands[brand] += count
+        buckets[bucket] += count
+        availability['in_stock' if stocked else 'out_of_stock'] += count
+    
+    category_rows = db.session.query(
+        Category.id, Category.name, Category.slug, func.count(product_categories.c.product_id)
+    ).join(
+        product_categories, product_categories.c.category_id == Category.id
+    ).filter(
+        product_categories.c.product_id.in_(select(product_ids.c.id))
+    ).group_by(Category.id, Category.name, Category.slug).all()
+    
+    edges = [0] + list(boundaries) + [None]
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'total': total,
+            'facets': {
+                'brands': [
+                    {'value': brand, 'count': count}
+                    for brand, count in sorted(brands.items(), key=lambda item: (-item[1], item[0]))
+                ],
+                'categories': [
+                    {'id': cat_id, 'name': name, 'slug': slug, 'count': count}
+                    for cat_id, name, slug, count in sorted(category_rows, key=lambda row: -row[3])
+                ],
+                'price_ranges': [
+                    {'min': edges[index], 'max': edges[index + 1], 'count': buckets.get(index, 0)}
+                    for index in range(len(edges) - 1)
+                ],
+                'availability': availability
             }
         }
     })
 
 
-@api_v1_bp.route('/products/<int:product_id>', methods=['GET'])
-def get_product(product_id):
+@api_v1_bp.route('/products/price-stats', methods=['GET'])
+@cached_response('products')
+def get_price_stats():
     """
-    Get single product by ID with full details
+    Get the price range and histogram for the current product filters
+    ---
+    Query Parameters:
+        Same filters as GET /products except min_price/max_price, which
+        the slider itself sets
+        - buckets: int (histogram buckets, default 10, max 50)
+    
+    Served from the catalog price array, or else one aggregate query.
     """
-    product = Product.query.get_or_404(product_id)
+    buckets = max(min(request.args.get('buckets', current_app.config['PRICE_STATS_BUCKETS'], type=int), 50), 1)
+    args = request.args.copy()
+    args.pop('min_price', None)
+    args.pop('max_price', None)
     
-    # Increment view count
-    product.increment_view()
-    db.session.commit()
+    stats = catalog.price_stats(args, buckets)
+    if stats is None:
+        stats = _price_stats_sql(args, buckets)
+    count, low, high, counts = stats
+    
+    width = (high - low) / len(counts) if counts else 0
+    return jsonify({
+        'success': True,
+        'data': {
+            'count': count,
+            'min': low,
+            'max': high,
+            'histogram': [
+                {
+                    'min': round(low + index * width, 2),
+                    'max': round(low + (index + 1) * width, 2) if index < len(counts) - 1 else high,
+                    'count': bucket_count
+                }
+                for index, bucket_count in enumerate(counts)
+            ]
+        }
+    })
+
+
+def _price_stats_sql(args, buckets):
+    """(count, min, max, bucket_counts) for the filters, in one statement"""
+    query, _ = filter_products(args)
+    prices = query.order_by(None).with_entities(Product.price.label('price')).cte('prices')
+    bounds = select(
+        func.min(prices.c.price).label('low'), func.max(prices.c.price).label('high')
+    ).cte('bounds')
+    position = (prices.c.price - bounds.c.low) * buckets / (bounds.c.high - bounds.c.low)
+    # CAST rounds on PostgreSQL but truncates on SQLite; step back when it
+    # rounded up, which floors on both (and needs no math functions)
+    rounded = cast(position, Integer)
+    bucket = case(
+        (bounds.c.high == bounds.c.low, 0),
+        (prices.c.price >= bounds.c.high, buckets - 1),
+        (rounded > position, rounded - 1),
+        else_=rounded
+    ).label('bucket')
+    rows = db.session.execute(
+        select(bounds.c.low, bounds.c.high, bucket, func.count()).select_from(
+            prices.join(bounds, true())
+        ).group_by(bounds.c.low, bounds.c.high, bucket)
+    ).all()
+    if not rows:
+        return 0, None, None, []
+    
+    low, high = rows[0][0], rows[0][1]
+    counts = [0] * (1 if high == low else buckets)
+    for _, _, index, bucket_count in rows:
+        counts[min(max(index, 0), len(counts) - 1)] += bucket_count
+    return sum(counts), low, high, counts
+
+
+@api_v1_bp.route('/products/batch', methods=['GET'])
+def get_products_batch():
+    """
+    Get many products in one request, in the order requested
+    ---
+    Query Parameters:
+        - ids: string (comma-separated product ids)
+        - slugs: string (comma-separated product slugs; ignored if ids is given)
+        - fields: string (comma-separated product fields to return)
+    """
+    fields = parse_product_fields(request.args)
+    max_items = current_app.config['PRODUCT_BATCH_MAX']
+    
+    if request.args.get('ids'):
+        try:
+            keys = [int(value) for value in request.args['ids'].split(',') if value.strip()]
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'ids must be comma-separated integers'
+            }), 400
+    else:
+        keys = [value.strip() for value in request.args.get('slugs', '').split(',') if value.strip()]
+    
+    keys = list(dict.fromkeys(keys))  # Drop duplicates, keep order
+    if not keys:
+        return jsonify({
+            'success': False,
+            'message': 'Provide ids or slugs'
+        }), 400
+    
+    if len(keys) > max_items:
+        return jsonify({
+            'success': False,
+            'message': f'At most {max_items} products per request'
+        }), 400
+    
+    if request.args.get('ids'):
+        products = fetch_products(keys, product_load_options(fields))
+        found = {product.id for product in products}
+    else:
+        # Same visibility as /products/slug/<slug>
+        by_slug = {
+            product.slug: product
+            for product in Product.query.options(*product_load_options(fields, 'slug')).filter(
+                Product.slug.in_(keys), Product.is_active == True
+            )
+        }
+        products = [by_slug[slug] for slug in keys if slug in by_slug]
+        found = set(by_slug)
     
     return jsonify({
         'success': True,
         'data': {
-            'product': product.to_dict(include_details=True)
+            'products': serialize_products(products, fields=fields),
+            'missing': [key for key in keys if key not in found]
         }
     })
 
 
+@api_v1_bp.route('/products/<int:product_id>', methods=['GET'])
+def get_product(product_id):
+    """
+    Get single product by ID with full details
+    """
+    fields = parse_product_fields(request.args)
+    product = Product.query.get_or_404(product_id)
+    etag = product_etag(product, fields)
+    
+    if is_fresh(etag):
+        response = not_modified(etag)
+    else:
+        response = with_etag(jsonify({
+            'success': True,
+            'data': {
+                'product': serialize_products([product], include_details=True, fields=fields)[0]
+            }
+        }), etag)
+    
+    # Not part of the ETag, so sent on 304s too
+    response.headers[VIEW_COUNT_HEADER] = str(product.view_count or 0)
+    # Buffered; written to view_count by the background flusher
+    view_counter.increment(product.id)
+    
+    return response
+
+
 @api_v1_bp.route('/products/slug/<slug>', methods=['GET'])
 def get_product_by_slug(slug):
     """
     Get product by slug
     """
+    fields = parse_product_fields(request.args)
     product = Product.query.filter_by(slug=slug, is_active=True).first_or_404()
+    etag = product_etag(product, fields)
+    
+    if is_fresh(etag):
+        response = not_modified(etag)
+    else:
+        response = with_etag(jsonify({
+            'success': True,
+            'data': {
+                'product': serialize_products([product], include_details=True, fields=fields)[0]
+            }
+        }), etag)
     
-    product.increment_view()
-    db.session.commit()
+    response.headers[VIEW_COUNT_HEADER] = str(product.view_count or 0)
+    view_counter.increment(product.id)
+    
+    return response
+
+
+@api_v1_bp.route('/products/<int:product_id>/related', methods=['GET'])
+@cached_response('products')
+def get_related_products(product_id):
+    """
+    Get products frequently bought together with a product
+    ---
+    Query Parameters:
+        - limit: int (default: 8, max: 50)
+        - fields: string (comma-separated product fields to return)
+    """
+    limit = max(min(request.args.get('limit', 8, type=int), 50), 1)
+    fields = parse_product_fields(request.args)
+    
+    Product.query.get_or_404(product_id)
+    
+    product_ids = related_product_ids(product_id, limit)
+    products = fetch_products(product_ids, product_load_options(fields))
     
     return jsonify({
         'success': True,
         'data': {
-            'product': product.to_dict(include_details=True)
+            'products': serialize_products(products, fields=fields)
         }
     })
 
 
 @api_v1_bp.route('/products/featured', methods=['GET'])
+@cached_response('products')
 def get_featured_products():
     """
     Get featured products for homepage
     """
-    limit = request.args.get('limit', 8, type=int)
-    products = Product.query.filter_by(
-        is_active=True, is_featured=True
-    ).order_by(desc(Product.created_at)).limit(limit).all()
+    limit = max(min(request.args.get('limit', 8, type=int), 100), 1)
+    fields = parse_product_fields(request.args)
+    product_ids = catalog.top('featured', 'newest', limit)
+    if product_ids is not None:
+        products = fetch_products(product_ids, product_load_options(fields))
+    else:
+        products = Product.query.options(*product_load_options(fields)).filter_by(
+            is_active=True, is_featured=True
+        ).order_by(desc(Product.created_at), desc(Product.id)).limit(limit).all()
     
     return jsonify({
         'success': True,
         'data': {
-            'products': [p.to_dict() for p in products]
+            'products': serialize_products(products, fields=fields)
         }
     })
 
 
 @api_v1_bp.route('/products/new', methods=['GET'])
+@cached_response('products')
 def get_new_products():
     """
     Get new arrivals
     """
-    limit = request.args.get('limit', 8, type=int)
-    products = Product.query.filter_by(
-        is_active=True, is_new=True
-    ).order_by(desc(Product.created_at)).limit(limit).all()
+    limit = max(min(request.args.get('limit', 8, type=int), 100), 1)
+    fields = parse_product_fields(request.args)
+    product_ids = catalog.top('new', 'newest', limit)
+    if product_ids is not None:
+        products = fetch_products(product_ids, product_load_options(fields))
+    else:
+        products = Product.query.options(*product_load_options(fields)).filter_by(
+            is_active=True, is_new=True
+        ).order_by(desc(Product.created_at), desc(Product.id)).limit(limit).all()
     
     return jsonify({
         'success': True,
         'data': {
-            'products': [p.to_dict() for p in products]
+            'products': serialize_products(products, fields=fields)
         }
     })
 
 
 @api_v1_bp.route('/products/bestsellers', methods=['GET'])
+@cached_response('products')
 def get_bestsellers():
     """
     Get bestselling products
     """
-    limit = request.args.get('limit', 8, type=int)
-    products = Product.query.filter_by(is_active=True).order_by(
-        desc(Product.sold_count)
-    ).limit(limit).all()
+    limit = max(min(request.args.get('limit', 8, type=int), 100), 1)
+    fields = parse_product_fields(request.args)
+    product_ids = catalog.top(None, 'popular', limit)
+    if product_ids is not None:
+        products = fetch_products(product_ids, product_load_options(fields))
+    else:
+        products = Product.query.options(*product_load_options(fields)).filter_by(
+            is_active=True
+        ).order_by(desc(Product.sold_count), desc(Product.id)).limit(limit).all()
     
     return jsonify({
         'success': True,
         'data': {
-            'products': [p.to_dict() for p in products]
+            'products': serialize_products(products, fields=fields)
         }
     })
 
@@ -204,36 +516,45 @@ def get_bestsellers():
 # ============ Categories ============
 
 @api_v1_bp.route('/categories', methods=['GET'])
+@cached_response('categories')
 def get_categories():
     """
     Get all categories
+    ---
+    Query Parameters:
+        - include_children: boolean (nest the full tree under each top-level category)
     """
     include_children = request.args.get('include_children', 'false') == 'true'
     
-    # Get top-level categories
-    categories = Category.query.filter_by(
-        is_active=True, parent_id=None
-    ).order_by(Category.display_order).all()
+    if include_children:
+        # Whole tree from one query, nested in memory
+        categories = serialize_category_tree(category_subtree())
+    else:
+        categories = serialize_categories(Category.query.filter_by(
+            is_active=True, parent_id=None
+        ).order_by(Category.display_order).all())
     
     return jsonify({
         'success': True,
         'data': {
-            'categories': [c.to_dict(include_children=include_children) for c in categories]
+            'categories': categories
         }
     })
 
 
 @api_v1_bp.route('/categories/<slug>', methods=['GET'])
+@cached_response('categories')
 def get_category(slug):
     """
     Get category by slug
+    Conditional GETs are answered by cached_response from the cached body's ETag.
     """
     category = Category.query.filter_by(slug=slug, is_active=True).first_or_404()
     
     return jsonify({
         'success': True,
         'data': {
-            'category': category.to_dict(include_children=True)
+            'category': serialize_category_tree(category_subtree(category.id), root_id=category.id)[0]
         }
     })
 
@@ -244,35 +565,66 @@ def get_category(slug):
 def get_product_reviews(product_id):
     """
     Get reviews for a product
+    ---
+    Query Parameters:
+        - page: int (default: 1)
+        - per_page: int (default: 10, max: 50)
+        - cursor: string (keyset pagination; pass an empty value for the
+          first page, then the returned next_cursor)
+    
+    The summary comes from the product's rating counters and reviewers are
+    loaded in the page query, so a page costs two queries however many
+    reviews the product has.
     """
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(min(request.args.get('per_page', 10, type=int), 50), 1)
     
     product = Product.query.get_or_404(product_id)
     
-    pagination = product.reviews.filter_by(is_approved=True).order_by(
-        desc(Review.created_at)
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    query = Review.query.options(
+        joinedload(Review.user).load_only(User.id, User.username, User.avatar_url)
+    ).filter(
+        Review.product_id == product_id, Review.is_approved == True
+    )
     
-    # Calculate rating distribution
-    all_reviews = product.reviews.filter_by(is_approved=True).all()
-    rating_distribution = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    for review in all_reviews:
-        rating_distribution[review.rating] += 1
+    summary = {
+        'average_rating': product.average_rating,
+        'total_reviews': product.review_count,
+        'rating_distribution': product.rating_distribution
+    }
+    
+    # Keyset pagination over the (product_id, is_approved, created_at) index
+    if cursor_requested(request.args):
+        keyset_page = keyset_paginate(
+            query, Review.created_at, Review.id,
+            cursor=request.args.get('cursor'),
+            per_page=per_page
+        )
+        return jsonify({
+            'success': True,
+            'data': dict(
+                summary,
+                reviews=[r.to_dict() for r in keyset_page.items],
+                pagination=keyset_page.to_dict()
+            )
+        })
+    
+    # The approved count is already on the product; skip the COUNT query
+    pagination = query.order_by(
+        desc(Review.created_at), desc(Review.id)
+    ).paginate(page=page, per_page=per_page, error_out=False, count=False)
     
     return jsonify({
         'success': True,
-        'data': {
-            'reviews': [r.to_dict() for r in pagination.items],
-            'average_rating': product.average_rating,
-            'total_reviews': product.review_count,
-            'rating_distribution': rating_distribution,
-            'pagination': {
-                'page': pagination.page,
-                'total_pages': pagination.pages,
-                'total_items': pagination.total
+        'data': dict(
+            summary,
+            reviews=[r.to_dict() for r in pagination.items],
+            pagination={
+                'page': page,
+                'total_pages': ceil(product.review_count / per_page),
+                'total_items': product.review_count
             }
-        }
+        )
     })
 
 
@@ -298,7 +650,7 @@ def create_review(product_id):
     
     # Validate rating
     rating = data.get('rating')
-    if not rating or rating < 1 or rating > 5:
+    if not isinstance(rating, int) or isinstance(rating, bool) or rating < 1 or rating > 5:
         return jsonify({
             'success': False,
             'message': 'Rating must be between 1 and 5'
@@ -313,7 +665,10 @@ def create_review(product_id):
     )
     
     db.session.add(review)
+    # New reviews are approved by default, so they count immediately
+    product.apply_rating(rating)
     db.session.commit()
+    review_saved.send(current_app._get_current_object(), product=product)
     
     return jsonify({
         'success': True,
@@ -332,16 +687,20 @@ def get_wishlist():
     """
     Get user's wishlist
     """
-    wishlist = current_user.wishlist.all()
+    fields = parse_product_fields(request.args)
+    wishlist = current_user.wishlist.options(
+        joinedload(WishlistItem.product).options(*product_load_options(fields))
+    ).all()
+    products = serialize_products([item.product for item in wishlist], fields=fields)
     
     return jsonify({
         'success': True,
         'data': {
             'wishlist': [{
                 'id': item.id,
-                'product': item.product.to_dict(),
+                'product': product,
                 'added_at': item.created_at.isoformat()
-            } for item in wishlist]
+            } for item, product in zip(wishlist, products)]
         }
     })
 
@@ -0,0 +1,47 @@
+"""
+FlaskMarket Enterprise - Recommendations API
+Personalized product feed for the signed-in user
+"""
+
+from flask import request, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy import desc
+from app.api.v1 import api_v1_bp
+from app.models import Product
+from app.services import catalog, fetch_products, recommend
+from app.utils.fields import parse_product_fields, product_load_options
+from app.utils.serializers import serialize_products
+
+
+@api_v1_bp.route('/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendations():
+    """
+    Get recommended products for the current user
+    ---
+    Query Parameters:
+        - limit: int (default: 12, max: 50)
+        - fields: string (comma-separated product fields to return)
+    Users without history get bestsellers (strategy: bestsellers)
+    """
+    limit = max(min(request.args.get('limit', 12, type=int), 50), 1)
+    fields = parse_product_fields(request.args)
+    
+    product_ids, strategy = recommend(current_user.id, limit)
+    if product_ids is None:
+        product_ids = catalog.top(None, 'popular', limit)
+    
+    if product_ids is not None:
+        products = fetch_products(product_ids, product_load_options(fields))
+    else:
+        products = Product.query.options(*product_load_options(fields)).filter_by(
+            is_active=True
+        ).order_by(desc(Product.sold_count), desc(Product.id)).limit(limit).all()
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'strategy': strategy,
+            'products': serialize_products(products, fields=fields)
+        }
+    })
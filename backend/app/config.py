@@ -27,10 +27,52 @@ class Config:
     RATELIMIT_STORAGE_URL = 'memory://'
     RATELIMIT_DEFAULT = "100 per hour"
     
+    # Caching
+    # CACHE_TYPE: app.utils.cache.LRUCache (in-process), FileSystemCache
+    # (set CACHE_DIR, shared by workers on one host) or RedisCache (set CACHE_REDIS_URL)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'app.utils.cache.LRUCache'
+    CACHE_DIR = os.environ.get('CACHE_DIR')
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_THRESHOLD = 2000
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_TIMEOUT = 300  # Seconds; writes purge entries before then
+    
+    # Pricing
+    FREE_SHIPPING_THRESHOLD = 500  # Subtotal at which shipping is free
+    SHIPPING_FLAT_RATE = 50
+    TAX_RATE = 0.18  # GST
+    
     # Pagination
     ITEMS_PER_PAGE = 12
     MAX_ITEMS_PER_PAGE = 100
     
+    # Product Search
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'  # auto, fts5, postgres, memory
+    SEARCH_MAX_RESULTS = 1000  # Candidate cap for the in-process index
+    FUZZY_SEARCH_THRESHOLD = 0.25  # Minimum trigram similarity; low enough for transpositions
+    FUZZY_SEARCH_EXPANSIONS = 20  # Similar words considered per query token
+    SUGGEST_LIMIT = 5  # Autocomplete results per kind (product, brand, category)
+    PRODUCT_BATCH_MAX = 200  # Products per /products/batch request
+    CART_BATCH_MAX = 100  # Operations per /cart/batch request
+    GUEST_CART_TTL = 7 * 24 * 3600  # Seconds an untouched guest cart is kept
+    GUEST_CART_MAX_LINES = 100
+    RECOMMENDATIONS_CACHE_TIMEOUT = 600  # Seconds a user's feed is reused
+    EXPORT_BATCH_SIZE = 500  # Rows fetched (and serialized) at a time by catalog exports
+    
+    # In-memory catalog engine (requires numpy; SQL is used otherwise)
+    CATALOG_ENGINE_ENABLED = os.environ.get('CATALOG_ENGINE_ENABLED', 'true') == 'true'
+    CATALOG_REFRESH_INTERVAL = 300  # Seconds between full snapshot reloads
+    CATALOG_TOP_K = 100  # Depth of the maintained featured/new/bestseller lists
+    
+    # Upper bounds of the price facet buckets (the last bucket is open-ended)
+    PRICE_FACET_BOUNDARIES = [50, 100, 250, 500, 1000, 2500]
+    PRICE_STATS_BUCKETS = 10  # Default histogram buckets for /products/price-stats
+    
+    # Product view counts are buffered and written in batches
+    VIEW_COUNTER_FLUSH_INTERVAL = 10  # Seconds; 0 writes every view immediately
+    VIEW_COUNTER_SHARDS = 16
+    
     # Upload Configuration
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -51,6 +93,7 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///flaskmarket_test.db'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
+    VIEW_COUNTER_FLUSH_INTERVAL = 0
 
 
 class ProductionConfig(Config):
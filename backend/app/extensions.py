@@ -9,6 +9,7 @@ from flask_jwt_extended import JWTManager
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_caching import Cache
 
 # Database ORM
 db = SQLAlchemy()
@@ -25,6 +26,9 @@ ma = Marshmallow()
 # Rate limiting
 limiter = Limiter(key_func=get_remote_address)
 
+# Caching (backend chosen by CACHE_TYPE)
+cache = Cache()
+
 
 # JWT Callbacks for enhanced functionality
 @jwt.user_identity_loader
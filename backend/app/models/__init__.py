@@ -4,20 +4,26 @@ Import all models for easy access
 """
 
 from app.models.user import User, Address
-from app.models.product import Product, Category, ProductImage, Review, WishlistItem
-from app.models.order import CartItem, Order, OrderItem, Transaction, Coupon
+from app.models.product import Product, Category, CategoryClosure, ProductImage, Review, WishlistItem
+from app.models.order import CartItem, GuestCart, Order, OrderItem, Transaction, Coupon
+from app.models.related import ProductPair, ProductOrderCount, JobCheckpoint
 
 __all__ = [
     'User',
     'Address',
     'Product',
     'Category',
+    'CategoryClosure',
     'ProductImage',
     'Review',
     'WishlistItem',
     'CartItem',
+    'GuestCart',
     'Order',
     'OrderItem',
     'Transaction',
-    'Coupon'
+    'Coupon',
+    'ProductPair',
+    'ProductOrderCount',
+    'JobCheckpoint'
 ]
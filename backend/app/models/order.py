@@ -32,16 +32,33 @@ class CartItem(db.Model):
         """Calculate item subtotal"""
         return self.product.price * self.quantity
     
-    def to_dict(self):
+    def to_dict(self, product_data=None):
+        if product_data is None and self.product:
+            product_data = self.product.to_dict()
+        
         return {
             'id': self.id,
-            'product': self.product.to_dict() if self.product else None,
+            'product': product_data,
             'quantity': self.quantity,
             'subtotal': self.subtotal,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
+class GuestCart(db.Model):
+    """
+    Cart of an anonymous shopper, keyed by the id inside their signed
+    cart token; rows past expires_at are ignored and swept periodically
+    """
+    __tablename__ = 'guest_carts'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    lines = db.Column(db.JSON, nullable=False, default=dict)  # {"product_id": quantity}
+    
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Order(db.Model):
     """Order model"""
     __tablename__ = 'orders'
@@ -99,29 +116,50 @@ class Order(db.Model):
         self.subtotal = sum(item.subtotal for item in self.items)
         self.total_amount = self.subtotal - self.discount_amount + self.shipping_cost + self.tax_amount
     
-    def to_dict(self, include_items=False):
-        data = {
-            'id': self.id,
-            'order_number': self.order_number,
-            'status': self.status,
-            'subtotal': self.subtotal,
-            'discount_amount': self.discount_amount,
-            'shipping_cost': self.shipping_cost,
-            'tax_amount': self.tax_amount,
-            'total_amount': self.total_amount,
-            'payment_method': self.payment_method,
-            'payment_status': self.payment_status,
-            'shipping_address': self.shipping_address,
-            'item_count': self.items.count(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'shipped_at': self.shipped_at.isoformat() if self.shipped_at else None,
-            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None
+    def to_dict(self, include_items=False, fields=None):
+        """
+        Serialize order to dictionary
+        ``fields`` limits the output (and the work done) to those keys
+        """
+        return {
+            name: ORDER_FIELDS[name][1](self)
+            for name in order_field_names(include_items, fields)
         }
-        
-        if include_items:
-            data['items'] = [item.to_dict() for item in self.items]
-        
-        return data
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Serialized order fields: name -> (columns read, value)
+ORDER_FIELDS = {
+    'id': (('id',), lambda o: o.id),
+    'order_number': (('order_number',), lambda o: o.order_number),
+    'status': (('status',), lambda o: o.status),
+    'subtotal': (('subtotal',), lambda o: o.subtotal),
+    'discount_amount': (('discount_amount',), lambda o: o.discount_amount),
+    'shipping_cost': (('shipping_cost',), lambda o: o.shipping_cost),
+    'tax_amount': (('tax_amount',), lambda o: o.tax_amount),
+    'total_amount': (('total_amount',), lambda o: o.total_amount),
+    'payment_method': (('payment_method',), lambda o: o.payment_method),
+    'payment_status': (('payment_status',), lambda o: o.payment_status),
+    'shipping_address': (('shipping_address',), lambda o: o.shipping_address),
+    'item_count': ((), lambda o: o.items.count()),
+    'created_at': (('created_at',), lambda o: _isoformat(o.created_at)),
+    'shipped_at': (('shipped_at',), lambda o: _isoformat(o.shipped_at)),
+    'delivered_at': (('delivered_at',), lambda o: _isoformat(o.delivered_at)),
+    'items': ((), lambda o: [item.to_dict() for item in o.items])
+}
+
+ORDER_LIST_FIELDS = tuple(name for name in ORDER_FIELDS if name != 'items')
+ORDER_DETAIL_FIELDS = tuple(ORDER_FIELDS)
+
+
+def order_field_names(include_items=False, fields=None):
+    """Keys Order.to_dict emits: the requested ``fields`` in declaration order, or the defaults"""
+    if fields is None:
+        return ORDER_DETAIL_FIELDS if include_items else ORDER_LIST_FIELDS
+    return [name for name in ORDER_DETAIL_FIELDS if name in fields]
 
 
 class OrderItem(db.Model):
@@ -4,6 +4,8 @@ Enterprise-grade product model with categories, variants, and inventory
 """
 
 from datetime import datetime
+from sqlalchemy import case, or_
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.extensions import db
 
 
@@ -13,6 +15,9 @@ product_categories = db.Table('product_categories',
     db.Column('category_id', db.Integer, db.ForeignKey('categories.id'), primary_key=True)
 )
 
+# Star rating -> its per-star counter column on Product
+RATING_STAR_COLUMNS = {star: f'rating_{star}_count' for star in range(1, 6)}
+
 
 class Category(db.Model):
     """Product category model"""
@@ -32,13 +37,17 @@ class Category(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     display_order = db.Column(db.Integer, default=0)
     
+    # Denormalized: active products here or in any subcategory
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
         return f'<Category {self.name}>'
     
-    def to_dict(self, include_children=False):
-        data = {
+    def to_dict(self):
+        return {
             'id': self.id,
             'name': self.name,
             'slug': self.slug,
@@ -46,13 +55,21 @@ class Category(db.Model):
             'image_url': self.image_url,
             'icon': self.icon,
             'is_active': self.is_active,
-            'product_count': self.products.count() if hasattr(self, 'products') else 0
+            'product_count': self.product_count
         }
-        
-        if include_children and self.children:
-            data['children'] = [child.to_dict() for child in self.children]
-        
-        return data
+
+
+class CategoryClosure(db.Model):
+    """
+    Closure table of the category tree: one row per (ancestor, descendant)
+    pair, including each category with itself at depth 0
+    Maintained by app.services.categories on category writes.
+    """
+    __tablename__ = 'category_closure'
+    
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True, index=True)
+    depth = db.Column(db.Integer, nullable=False, default=0)
 
 
 class Product(db.Model):
@@ -96,7 +113,17 @@ class Product(db.Model):
     
     # Stats
     view_count = db.Column(db.Integer, default=0)
-    sold_count = db.Column(db.Integer, default=0)
+    sold_count = db.Column(db.Integer, default=0, index=True)
+    
+    # Rating aggregates over approved reviews (maintained by apply_rating)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_average = db.Column(db.Float, nullable=False, default=0, index=True)
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0)
     
     # Brand
     brand = db.Column(db.String(100))
@@ -123,13 +150,18 @@ class Product(db.Model):
             return round(((self.compare_price - self.price) / self.compare_price) * 100)
         return 0
     
-    @property
+    @hybrid_property
     def in_stock(self):
         """Check if product is in stock"""
         if not self.track_inventory:
             return True
         return self.stock_quantity > 0
     
+    @in_stock.expression
+    def in_stock(cls):
+        # Same rule in SQL, shared by the in_stock filter, facets and catalog
+        return or_(cls.track_inventory == False, cls.stock_quantity > 0)
+    
     @property
     def low_stock(self):
         """Check if product is low on stock"""
@@ -137,16 +169,42 @@ class Product(db.Model):
     
     @property
     def average_rating(self):
-        """Calculate average rating from reviews"""
-        reviews = self.reviews.all()
-        if not reviews:
+        """Average rating of approved reviews"""
+        if not self.rating_count:
             return 0
-        return round(sum(r.rating for r in reviews) / len(reviews), 1)
+        return round(self.rating_sum / self.rating_count, 1)
     
     @property
     def review_count(self):
-        """Get total review count"""
-        return self.reviews.count()
+        """Number of approved reviews"""
+        return self.rating_count or 0
+    
+    @property
+    def rating_distribution(self):
+        """Approved review count per star"""
+        return {
+            star: getattr(self, f'rating_{star}_count') or 0
+            for star in (5, 4, 3, 2, 1)
+        }
+    
+    def apply_rating(self, rating, delta=1):
+        """
+        Add (delta=1) or remove (delta=-1) an approved review's rating
+        Updates are SQL expressions, so concurrent reviews don't overwrite
+        each other; commit together with the review change. Raises
+        ValueError unless rating is an integer from 1 to 5.
+        """
+        # bool is an int subclass (and True == 1), so rule it out first
+        star = None if isinstance(rating, bool) else RATING_STAR_COLUMNS.get(rating)
+        if star is None:
+            raise ValueError(f'Rating must be an integer from 1 to 5, not {rating!r}')
+        new_sum = Product.rating_sum + rating * delta
+        new_count = Product.rating_count + delta
+        
+        self.rating_sum = new_sum
+        self.rating_count = new_count
+        self.rating_average = case((new_count > 0, new_sum * 1.0 / new_count), else_=0)
+        setattr(self, star, getattr(Product, star) + delta)
     
     def increment_view(self):
         """Increment view count"""
@@ -163,40 +221,81 @@ class Product(db.Model):
         if self.track_inventory:
             self.stock_quantity += quantity
     
-    def to_dict(self, include_details=False):
-        """Serialize product to dictionary"""
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'slug': self.slug,
-            'sku': self.sku,
-            'short_description': self.short_description,
-            'price': self.price,
-            'compare_price': self.compare_price,
-            'discount_percentage': self.discount_percentage,
-            'thumbnail_url': self.thumbnail_url,
-            'in_stock': self.in_stock,
-            'stock_quantity': self.stock_quantity if self.track_inventory else None,
-            'average_rating': self.average_rating,
-            'review_count': self.review_count,
-            'brand': self.brand,
-            'is_featured': self.is_featured,
-            'is_new': self.is_new,
-            'categories': [cat.to_dict() for cat in self.categories]
-        }
-        
-        if include_details:
-            data.update({
-                'description': self.description,
-                'specifications': self.specifications,
-                'barcode': self.barcode,
-                'images': [img.to_dict() for img in self.images.all()],
-                'view_count': self.view_count,
-                'sold_count': self.sold_count,
-                'created_at': self.created_at.isoformat() if self.created_at else None
-            })
-        
+    def related_data(self, include_details=False, fields=None):
+        """
+        Values that need extra queries per product
+        serialize_products() preloads these for many products at once
+        """
+        names = product_field_names(include_details, fields)
+        data = {}
+        if 'categories' in names:
+            data['categories'] = [cat.to_dict() for cat in self.categories]
+        if 'images' in names:
+            data['images'] = [img.to_dict() for img in self.images.all()]
         return data
+    
+    def to_dict(self, include_details=False, related=None, fields=None):
+        """
+        Serialize product to dictionary
+        ``fields`` limits the output to those keys; only the attributes they
+        need are read, so columns deferred with load_only stay unloaded
+        """
+        if related is None:
+            related = self.related_data(include_details, fields)
+        
+        return {
+            name: PRODUCT_FIELDS[name][1](self, related)
+            for name in product_field_names(include_details, fields)
+        }
+
+
+# Serialized product fields: name -> (columns read, value)
+PRODUCT_FIELDS = {
+    'id': (('id',), lambda p, related: p.id),
+    'name': (('name',), lambda p, related: p.name),
+    'slug': (('slug',), lambda p, related: p.slug),
+    'sku': (('sku',), lambda p, related: p.sku),
+    'short_description': (('short_description',), lambda p, related: p.short_description),
+    'price': (('price',), lambda p, related: p.price),
+    'compare_price': (('compare_price',), lambda p, related: p.compare_price),
+    'discount_percentage': (('price', 'compare_price'), lambda p, related: p.discount_percentage),
+    'thumbnail_url': (('thumbnail_url',), lambda p, related: p.thumbnail_url),
+    'in_stock': (('track_inventory', 'stock_quantity'), lambda p, related: p.in_stock),
+    'stock_quantity': (
+        ('track_inventory', 'stock_quantity'),
+        lambda p, related: p.stock_quantity if p.track_inventory else None
+    ),
+    'average_rating': (('rating_sum', 'rating_count'), lambda p, related: p.average_rating),
+    'review_count': (('rating_count',), lambda p, related: p.review_count),
+    'brand': (('brand',), lambda p, related: p.brand),
+    'is_featured': (('is_featured',), lambda p, related: p.is_featured),
+    'is_new': (('is_new',), lambda p, related: p.is_new),
+    'categories': ((), lambda p, related: related['categories']),
+    'description': (('description',), lambda p, related: p.description),
+    'specifications': (('specifications',), lambda p, related: p.specifications),
+    'barcode': (('barcode',), lambda p, related: p.barcode),
+    'images': ((), lambda p, related: related['images']),
+    'view_count': (('view_count',), lambda p, related: p.view_count),
+    'sold_count': (('sold_count',), lambda p, related: p.sold_count),
+    'created_at': (
+        ('created_at',),
+        lambda p, related: p.created_at.isoformat() if p.created_at else None
+    )
+}
+
+# Only emitted with include_details (or when asked for by name)
+PRODUCT_DETAIL_ONLY_FIELDS = (
+    'description', 'specifications', 'barcode', 'images', 'view_count', 'sold_count', 'created_at'
+)
+PRODUCT_LIST_FIELDS = tuple(name for name in PRODUCT_FIELDS if name not in PRODUCT_DETAIL_ONLY_FIELDS)
+PRODUCT_DETAIL_FIELDS = tuple(PRODUCT_FIELDS)
+
+
+def product_field_names(include_details=False, fields=None):
+    """Keys Product.to_dict emits: the requested ``fields`` in declaration order, or the defaults"""
+    if fields is None:
+        return PRODUCT_DETAIL_FIELDS if include_details else PRODUCT_LIST_FIELDS
+    return [name for name in PRODUCT_DETAIL_FIELDS if name in fields]
 
 
 class ProductImage(db.Model):
@@ -241,6 +340,11 @@ class Review(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # A product's approved reviews, newest first, as one index range
+        db.Index('ix_reviews_product_approved_created', 'product_id', 'is_approved', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
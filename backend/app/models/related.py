@@ -0,0 +1,45 @@
+"""
+FlaskMarket Enterprise - Related Product Models
+Item-item co-purchase counts and scores built from order history
+"""
+
+from datetime import datetime
+from app.extensions import db
+
+
+class ProductPair(db.Model):
+    """
+    How often two products were bought in the same order
+    Stored in both directions so a product's neighbours are one index range.
+    """
+    __tablename__ = 'product_pairs'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    related_product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    
+    co_count = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Float, nullable=False, default=0)  # Cosine similarity
+    
+    __table_args__ = (
+        db.Index('ix_product_pairs_product_score', 'product_id', 'score'),
+    )
+    
+    def __repr__(self):
+        return f'<ProductPair {self.product_id}-{self.related_product_id}>'
+
+
+class ProductOrderCount(db.Model):
+    """Number of (counted) orders containing each product"""
+    __tablename__ = 'product_order_counts'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class JobCheckpoint(db.Model):
+    """Last processed position of an incremental batch job"""
+    __tablename__ = 'job_checkpoints'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,46 @@
+"""
+FlaskMarket Enterprise - Services Package
+Stateful engines (indexes, buffers, caches) shared by the API blueprints
+"""
+
+from app.services.search import search_index
+from app.services.fuzzy import fuzzy_search
+from app.services.suggest import suggestions
+from app.services.catalog import catalog, fetch_products
+from app.services.categories import (
+    rebuild_category_closure, link_category, move_category, descendant_ids, category_subtree,
+    counted_category_ids, adjust_category_counts, refresh_category_counts
+)
+from app.services.guest_carts import guest_carts
+from app.services.pricing import basket_prices, cart_lines, coupon_error, price_basket
+from app.services.ratings import reconcile_ratings
+from app.services.related import build_related, order_status_changed, related_product_ids
+from app.services.recommendations import recommend
+from app.services.view_counter import view_counter
+
+__all__ = [
+    'search_index',
+    'fuzzy_search',
+    'suggestions',
+    'catalog',
+    'fetch_products',
+    'rebuild_category_closure',
+    'link_category',
+    'move_category',
+    'descendant_ids',
+    'category_subtree',
+    'counted_category_ids',
+    'adjust_category_counts',
+    'refresh_category_counts',
+    'guest_carts',
+    'basket_prices',
+    'cart_lines',
+    'coupon_error',
+    'price_basket',
+    'reconcile_ratings',
+    'build_related',
+    'order_status_changed',
+    'related_product_ids',
+    'recommend',
+    'view_counter'
+]
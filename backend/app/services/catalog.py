@@ -0,0 +1,455 @@
+"""
+FlaskMarket Enterprise - In-Memory Catalog Engine
+Columnar NumPy snapshot of the active catalog for listing, filtering and sorting
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Product, Category
+from app.models.product import product_categories
+from app.services.categories import descendant_ids
+from app.signals import inventory_changed, product_saved, review_saved
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# Sort option -> (snapshot column, descending); mirrors PRODUCT_SORT_KEYS
+SORT_COLUMNS = {
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    'popular': ('sold', True),
+    'rating': ('rating', True),
+    'newest': ('created', True)
+}
+
+
+def _timestamp(value):
+    return (value - EPOCH).total_seconds() if value else 0.0
+
+
+class TopList:
+    """
+    The best ``size`` rows for one (flag, sort) pair, kept in rank order.
+    ``complete`` means every qualifying row is in the list. When a member
+    drops out of a truncated list its replacement is unknown, so the list
+    is marked stale and recomputed on the next read.
+    """
+
+    def __init__(self, keys, size, complete):
+        self.size = size
+        self.entries = sorted(keys)      # (rank key, position), best first
+        self.keys = {position: key for key, position in keys}
+        self.complete = complete
+        self.stale = False
+
+    def discard(self, position):
+        key = self.keys.pop(position, None)
+        if key is not None:
+            del self.entries[bisect_left(self.entries, (key, position))]
+            return True
+        return False
+
+    def offer(self, key, position):
+        """Insert a qualifying row if it ranks within the list"""
+        if not self.complete and len(self.entries) >= self.size and (key, position) > self.entries[-1]:
+            return
+        insort(self.entries, (key, position))
+        self.keys[position] = key
+        if len(self.entries) > self.size:
+            _, dropped = self.entries.pop()
+            del self.keys[dropped]
+            self.complete = False
+
+
+def fetch_products(product_ids, options=()):
+    """Load products by id with one IN query, in the order given"""
+    if not product_ids:
+        return []
+    query = Product.query.options(*options).filter(Product.id.in_(product_ids))
+    products = {p.id: p for p in query}
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+
+class CatalogSnapshot:
+    """Column arrays for every product, one row per product"""
+
+    def __init__(self, rows, memberships):
+        self.ids = np.array([row.id for row in rows], dtype=np.int64)
+        self.active = np.array([bool(row.is_active) for row in rows], dtype=bool)
+        self.price = np.array([row.price or 0 for row in rows], dtype=np.float64)
+        self.stock = np.array([row.stock_quantity or 0 for row in rows], dtype=np.int64)
+        self.in_stock = np.array([bool(row.in_stock) for row in rows], dtype=bool)
+        self.sold = np.array([row.sold_count or 0 for row in rows], dtype=np.int64)
+        self.rating = np.array([row.rating_average or 0 for row in rows], dtype=np.float64)
+        self.created = np.array([_timestamp(row.created_at) for row in rows], dtype=np.float64)
+        self.featured = np.array([bool(row.is_featured) for row in rows], dtype=bool)
+        self.new = np.array([bool(row.is_new) for row in rows], dtype=bool)
+
+        # Brands are dictionary-encoded; -1 means no brand
+        self.brands = []
+        self._brand_codes = {}
+        self.brand = np.array([self._brand_code(row.brand) for row in rows], dtype=np.int32)
+
+        self.positions = {int(product_id): index for index, product_id in enumerate(self.ids)}
+
+        # Category id -> sorted row positions of its member products
+        members = {}
+        for product_id, category_id in memberships:
+            position = self.positions.get(product_id)
+            if position is not None:
+                members.setdefault(category_id, []).append(position)
+        self.categories = {
+            category_id: np.array(sorted(rows_), dtype=np.int64)
+            for category_id, rows_ in members.items()
+        }
+        self.top_lists = {}  # (flag, sort) -> TopList, built on first read
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _brand_code(self, brand):
+        if not brand:
+            return -1
+        code = self._brand_codes.get(brand)
+        if code is None:
+            code = len(self.brands)
+            self.brands.append(brand)
+            self._brand_codes[brand] = code
+        return code
+
+    def _append_row(self):
+        for name in ('ids', 'active', 'price', 'stock', 'in_stock', 'sold', 'rating',
+                     'created', 'featured', 'new', 'brand'):
+            column = getattr(self, name)
+            setattr(self, name, np.append(column, np.zeros(1, dtype=column.dtype)))
+        return len(self.ids) - 1
+
+    def update(self, product, category_ids=None):
+        """Write one product's current values into its row (appending if new)"""
+        position = self.positions.get(product.id)
+        if position is None:
+            position = self._append_row()
+            self.positions[product.id] = position
+            self.ids[position] = product.id
+
+        self.active[position] = bool(product.is_active)
+        self.price[position] = product.price or 0
+        self.stock[position] = product.stock_quantity or 0
+        self.in_stock[position] = bool(product.in_stock)
+        self.sold[position] = product.sold_count or 0
+        self.rating[position] = product.rating_average or 0
+        self.created[position] = _timestamp(product.created_at)
+        self.featured[position] = bool(product.is_featured)
+        self.new[position] = bool(product.is_new)
+        self.brand[position] = self._brand_code(product.brand)
+        self._update_top_lists(position)
+
+        if category_ids is not None:
+            for category_id, rows_ in list(self.categories.items()):
+                if category_id not in category_ids and position in rows_:
+                    self.categories[category_id] = rows_[rows_ != position]
+            for category_id in category_ids:
+                rows_ = self.categories.get(category_id, np.array([], dtype=np.int64))
+                if position not in rows_:
+                    self.categories[category_id] = np.sort(np.append(rows_, position))
+
+    def update_inventory(self, product):
+        position = self.positions.get(product.id)
+        if position is not None:
+            self.stock[position] = product.stock_quantity or 0
+            self.in_stock[position] = bool(product.in_stock)
+            self.sold[position] = product.sold_count or 0
+            self._update_top_lists(position)
+
+    def update_rating(self, product):
+        position = self.positions.get(product.id)
+        if position is not None:
+            self.rating[position] = product.rating_average or 0
+            self._update_top_lists(position)
+
+    def _qualifies(self, position, flag):
+        return bool(self.active[position]) and (flag is None or bool(getattr(self, flag)[position]))
+
+    def _rank_key(self, position, sort):
+        """Sort key under which smaller ranks first, matching order()"""
+        column, descending = SORT_COLUMNS.get(sort, SORT_COLUMNS['newest'])
+        value = float(getattr(self, column)[position])
+        product_id = int(self.ids[position])
+        return (-value, -product_id) if descending else (value, product_id)
+
+    def _build_top_list(self, flag, sort, size):
+        mask = self.active.copy()
+        if flag:
+            mask &= getattr(self, flag)
+        rows = np.flatnonzero(mask)
+        complete = len(rows) <= size
+        if not complete:
+            # Partial selection: keep rows at or beyond the size-th best value
+            column, descending = SORT_COLUMNS.get(sort, SORT_COLUMNS['newest'])
+            values = getattr(self, column)[rows]
+            if descending:
+                threshold = np.partition(values, len(values) - size)[len(values) - size]
+                rows = rows[values >= threshold]
+            else:
+                threshold = np.partition(values, size - 1)[size - 1]
+                rows = rows[values <= threshold]
+        rows = self.order(rows, sort)[:size]
+        keys = [(self._rank_key(position, sort), int(position)) for position in rows]
+        return TopList(keys, size, complete)
+
+    def _update_top_lists(self, position):
+        """Re-rank one changed row in every maintained top list"""
+        position = int(position)
+        for (flag, sort), top_list in self.top_lists.items():
+            if top_list.stale:
+                continue
+            was_member = top_list.discard(position)
+            if self._qualifies(position, flag):
+                top_list.offer(self._rank_key(position, sort), position)
+            if was_member and not top_list.complete and len(top_list.entries) < top_list.size:
+                top_list.stale = True
+
+    def top(self, flag, sort, limit, size):
+        """Ids of the best ``limit`` rows, from the maintained top list when it is deep enough"""
+        if limit > size:
+            mask = self.active.copy()
+            if flag:
+                mask &= getattr(self, flag)
+            return self.ids[self.order(np.flatnonzero(mask), sort)[:limit]].tolist()
+
+        top_list = self.top_lists.get((flag, sort))
+        if top_list is None or top_list.stale or top_list.size != size:
+            top_list = self._build_top_list(flag, sort, size)
+            self.top_lists[(flag, sort)] = top_list
+        return [int(self.ids[position]) for _, position in top_list.entries[:limit]]
+
+    def order(self, rows, sort):
+        """Sort row positions by a sort option, ties broken by id"""
+        column, descending = SORT_COLUMNS.get(sort, SORT_COLUMNS['newest'])
+        values = getattr(self, column)[rows]
+        ids = self.ids[rows]
+        if descending:
+            return rows[np.lexsort((-ids, -values))]
+        return rows[np.lexsort((ids, values))]
+
+
+class CatalogEngine:
+    """
+    Answers catalog listings from an in-memory column snapshot.
+    Admin writes and checkouts update the snapshot in place through the
+    product_saved / inventory_changed signals; a full reload runs every
+    CATALOG_REFRESH_INTERVAL seconds so other workers' writes show up too.
+    Returns None whenever it can't answer, and callers fall back to SQL.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.RLock()
+        self._reloading = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOG_ENGINE_ENABLED', True)
+        app.config.setdefault('CATALOG_REFRESH_INTERVAL', 300)
+        app.config.setdefault('CATALOG_TOP_K', 100)
+        app.extensions['catalog'] = None
+        product_saved.connect(self._on_product_saved)
+        inventory_changed.connect(self._on_inventory_changed)
+        review_saved.connect(self._on_review_saved)
+
+    @property
+    def enabled(self):
+        return np is not None and current_app.config['CATALOG_ENGINE_ENABLED']
+
+    def _snapshot(self):
+        """Current snapshot, loading it on first use and reloading when stale"""
+        snapshot = current_app.extensions.get('catalog')
+        if snapshot is None:
+            with self._lock:
+                snapshot = current_app.extensions.get('catalog')
+                if snapshot is None:
+                    snapshot = self.rebuild()
+        elif time.time() - snapshot.built_at > current_app.config['CATALOG_REFRESH_INTERVAL']:
+            self._reload_in_background()
+        return snapshot
+
+    def rebuild(self):
+        """Load a fresh snapshot from the database. Returns the snapshot."""
+        rows = db.session.query(
+            Product.id, Product.is_active, Product.price, Product.stock_quantity,
+            Product.in_stock.label('in_stock'), Product.sold_count, Product.rating_average,
+            Product.created_at, Product.is_featured, Product.is_new, Product.brand
+        ).order_by(Product.id).all()
+        memberships = db.session.query(
+            product_categories.c.product_id, product_categories.c.category_id
+        ).all()
+
+        snapshot = CatalogSnapshot(rows, memberships)
+        with self._lock:
+            current_app.extensions['catalog'] = snapshot
+        return snapshot
+
+    @contextmanager
+    def reading(self):
+        """
+        Hold the current snapshot steady while its arrays are read
+        Yields None when the engine is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+        snapshot = self._snapshot()
+        with self._lock:
+            yield snapshot
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        app = current_app._get_current_object()
+
+        def reload():
+            try:
+                with app.app_context():
+                    self.rebuild()
+            except Exception:
+                app.logger.exception('Catalog snapshot reload failed')
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=reload, name='catalog-reload', daemon=True).start()
+
+    def _mask(self, snapshot, args):
+        """Boolean row mask for the /products filters, or None if unsupported"""
+        if args.get('search', '').strip():
+            return None
+
+        mask = snapshot.active.copy()
+
+        category_slug = args.get('category')
+        if category_slug:
+            category = Category.query.filter_by(slug=category_slug).first()
+            if category:
+                in_category = np.zeros(len(snapshot), dtype=bool)
+                for (category_id,) in db.session.execute(descendant_ids(category.id)):
+                    in_category[snapshot.categories.get(category_id, [])] = True
+                mask &= in_category
+
+        min_price = args.get('min_price', type=float)
+        max_price = args.get('max_price', type=float)
+        if min_price is not None:
+            mask &= snapshot.price >= min_price
+        if max_price is not None:
+            mask &= snapshot.price <= max_price
+
+        brand = args.get('brand')
+        if brand:
+            # Same semantics as ILIKE '%brand%', evaluated once per distinct brand
+            term = brand.lower()
+            codes = [code for code, name in enumerate(snapshot.brands) if term in name.lower()]
+            mask &= np.isin(snapshot.brand, codes)
+
+        if args.get('in_stock') == 'true':
+            mask &= snapshot.in_stock
+
+        if args.get('featured') == 'true':
+            mask &= snapshot.featured
+
+        return mask
+
+    def query(self, args, sort, page, per_page):
+        """
+        Filter, sort and paginate like GET /products
+        Returns (product_ids, total) or None when SQL must answer
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = self._snapshot()
+        with self._lock:
+            mask = self._mask(snapshot, args)
+            if mask is None:
+                return None
+            rows = snapshot.order(np.flatnonzero(mask), sort)
+            start = (max(page, 1) - 1) * per_page
+            product_ids = snapshot.ids[rows[start:start + per_page]].tolist()
+        return product_ids, len(rows)
+
+    def price_stats(self, args, buckets):
+        """
+        Price spread of the products matching the /products filters
+        Returns (count, min, max, bucket_counts) with ``buckets`` equal-width
+        buckets between min and max, or None when SQL must answer
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = self._snapshot()
+        with self._lock:
+            mask = self._mask(snapshot, args)
+            if mask is None:
+                return None
+            prices = snapshot.price[mask]
+
+        if not len(prices):
+            return 0, None, None, []
+        low, high = float(prices.min()), float(prices.max())
+        if high == low:
+            return len(prices), low, high, [len(prices)]
+        # Same bucketing as the SQL path: truncate, last edge inclusive
+        index = np.minimum(((prices - low) * buckets / (high - low)).astype(np.int64), buckets - 1)
+        return len(prices), low, high, np.bincount(index, minlength=buckets).tolist()
+
+    def top(self, flag, sort, limit):
+        """
+        Top active products by a sort option, optionally restricted to a
+        boolean column ('featured' or 'new'). Served from a top list that
+        writes keep current and snapshot reloads rebuild. Returns product
+        ids or None.
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = self._snapshot()
+        with self._lock:
+            return snapshot.top(flag, sort, limit, current_app.config['CATALOG_TOP_K'])
+
+    def _on_product_saved(self, sender, product, **extra):
+        snapshot = sender.extensions.get('catalog')
+        if snapshot is None:
+            return
+        with self._lock:
+            snapshot.update(product, category_ids={c.id for c in product.categories})
+
+    def _on_review_saved(self, sender, product, **extra):
+        snapshot = sender.extensions.get('catalog')
+        if snapshot is None:
+            return
+        with self._lock:
+            snapshot.update_rating(product)
+
+    def _on_inventory_changed(self, sender, products, **extra):
+        snapshot = sender.extensions.get('catalog')
+        if snapshot is None:
+            return
+        with self._lock:
+            for product in products:
+                snapshot.update_inventory(product)
+
+
+catalog = CatalogEngine()
@@ -0,0 +1,200 @@
+"""
+FlaskMarket Enterprise - Category Hierarchy
+Closure-table maintenance, subtree lookups and product counts for nested
+categories. Writes keep Category.product_count current incrementally;
+refresh_category_counts is the full rollup for the CLI and startup.
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, literal, select, update
+
+from app.extensions import db
+from app.models import Category, CategoryClosure, Product
+from app.models.product import product_categories
+
+
+def rebuild_category_closure():
+    """
+    Recompute the whole closure table from Category.parent_id
+    Returns the number of closure rows written.
+    """
+    parents = dict(db.session.query(Category.id, Category.parent_id))
+
+    rows = []
+    for category_id in parents:
+        ancestor, depth, seen = category_id, 0, set()
+        while ancestor is not None and ancestor not in seen:
+            rows.append({'ancestor_id': ancestor, 'descendant_id': category_id, 'depth': depth})
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+
+    db.session.execute(delete(CategoryClosure))
+    if rows:
+        db.session.execute(insert(CategoryClosure), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def link_category(category):
+    """
+    Add closure rows for a newly created (flushed) category
+    Commit together with the category.
+    """
+    db.session.add(CategoryClosure(ancestor_id=category.id, descendant_id=category.id, depth=0))
+    if category.parent_id is not None:
+        db.session.execute(insert(CategoryClosure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(
+                CategoryClosure.ancestor_id, literal(category.id), CategoryClosure.depth + 1
+            ).where(CategoryClosure.descendant_id == category.parent_id)
+        ))
+
+
+def move_category(category, parent_id):
+    """
+    Re-parent a category together with its whole subtree
+    Raises ValueError if parent_id is the category itself or one of its
+    descendants. Product counts of the old and new ancestors are rolled up
+    again. Commit together with the category.
+    """
+    subtree = dict(db.session.query(CategoryClosure.descendant_id, CategoryClosure.depth).filter(
+        CategoryClosure.ancestor_id == category.id
+    ))
+    if parent_id in subtree:
+        raise ValueError('A category cannot be moved under itself or its descendants')
+
+    old_ancestors = [
+        ancestor_id for (ancestor_id,) in db.session.query(CategoryClosure.ancestor_id).filter(
+            CategoryClosure.descendant_id == category.id,
+            CategoryClosure.ancestor_id != category.id
+        )
+    ]
+
+    # Detach the subtree from its old ancestors
+    db.session.execute(delete(CategoryClosure).where(
+        CategoryClosure.descendant_id.in_(list(subtree)),
+        CategoryClosure.ancestor_id.notin_(list(subtree))
+    ))
+
+    # Attach it below every ancestor of the new parent
+    ancestors = []
+    if parent_id is not None:
+        ancestors = db.session.query(CategoryClosure.ancestor_id, CategoryClosure.depth).filter(
+            CategoryClosure.descendant_id == parent_id
+        ).all()
+        rows = [
+            {
+                'ancestor_id': ancestor_id,
+                'descendant_id': descendant_id,
+                'depth': ancestor_depth + descendant_depth + 1
+            }
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree.items()
+        ]
+        if rows:
+            db.session.execute(insert(CategoryClosure), rows)
+
+    category.parent_id = parent_id
+    # Products can sit in several categories, so the moved subtree's
+    # contribution to each ancestor's distinct count has to be recounted
+    _roll_up_counts(set(old_ancestors) | {ancestor_id for ancestor_id, _ in ancestors})
+
+
+def descendant_ids(category_id):
+    """SELECT of the ids of a category and all its descendants, for use in IN (...)"""
+    return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+
+
+def category_subtree(category_id=None, active_only=True):
+    """
+    Every category (or one category and its descendants) in one query,
+    ordered for display; pair with serialize_category_tree
+    """
+    query = Category.query
+    if category_id is not None:
+        query = query.join(
+            CategoryClosure, CategoryClosure.descendant_id == Category.id
+        ).filter(CategoryClosure.ancestor_id == category_id)
+    if active_only:
+        query = query.filter(Category.is_active == True)
+    return query.order_by(Category.display_order, Category.id).all()
+
+
+def counted_category_ids(product):
+    """Ids of the categories a product counts toward: its own, or none while inactive"""
+    if not product.is_active:
+        return set()
+    return {category.id for category in product.categories}
+
+
+def adjust_category_counts(before, after):
+    """
+    Apply one product's membership change to Category.product_count
+    ``before`` and ``after`` are counted_category_ids taken around the
+    write. Only ancestors that gained or lost the product move, by one,
+    with a single closure lookup. Commit together with the product.
+    """
+    before, after = set(before), set(after)
+    if before == after:
+        return
+
+    covering = defaultdict(set)
+    for ancestor_id, descendant_id in db.session.query(
+        CategoryClosure.ancestor_id, CategoryClosure.descendant_id
+    ).filter(CategoryClosure.descendant_id.in_(before | after)):
+        covering[descendant_id].add(ancestor_id)
+
+    was = set().union(*(covering[category_id] for category_id in before))
+    now = set().union(*(covering[category_id] for category_id in after))
+    for ids, step in ((now - was, 1), (was - now, -1)):
+        if ids:
+            db.session.execute(update(Category).where(Category.id.in_(ids)).values(
+                product_count=Category.product_count + step
+            ).execution_options(synchronize_session=False))
+
+
+def _roll_up_counts(category_ids=None):
+    """
+    Recount Category.product_count (for every category, or just the given
+    ones) from one grouped query; writes only the counts that changed and
+    returns their number
+    """
+    query = db.session.query(
+        CategoryClosure.ancestor_id, func.count(func.distinct(Product.id))
+    ).join(
+        product_categories, product_categories.c.category_id == CategoryClosure.descendant_id
+    ).join(
+        Product, Product.id == product_categories.c.product_id
+    ).filter(
+        Product.is_active == True
+    )
+    current = db.session.query(Category.id, Category.product_count)
+    if category_ids is not None:
+        if not category_ids:
+            return 0
+        query = query.filter(CategoryClosure.ancestor_id.in_(category_ids))
+        current = current.filter(Category.id.in_(category_ids))
+    counts = dict(query.group_by(CategoryClosure.ancestor_id))
+
+    changed = [
+        {'id': category_id, 'product_count': counts.get(category_id, 0)}
+        for category_id, product_count in current
+        if product_count != counts.get(category_id, 0)
+    ]
+    if changed:
+        db.session.execute(update(Category), changed)
+    return len(changed)
+
+
+def refresh_category_counts():
+    """
+    Roll up Category.product_count for the whole catalog: distinct active
+    products in each category or any of its subcategories
+    API writes keep the counts current on their own; this catches up with
+    changes made outside it. Returns the number of categories changed.
+    """
+    changed = _roll_up_counts()
+    db.session.commit()
+    return changed
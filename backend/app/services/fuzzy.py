@@ -0,0 +1,224 @@
+"""
+FlaskMarket Enterprise - Fuzzy Product Search
+Typo-tolerant matching over product name, brand and SKU using a trigram
+index of the catalog's vocabulary
+"""
+
+import threading
+from array import array
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import case, false
+
+from app.extensions import db
+from app.models import Product
+from app.services.search import tokenize
+from app.signals import product_saved
+
+
+# Indexed columns and their weights; the position is stored in each posting
+FUZZY_FIELDS = (
+    ('name', 1.0),
+    ('brand', 0.9),
+    ('sku', 0.6),
+)
+
+
+def trigrams(word):
+    """Trigrams of a word padded like pg_trgm ('  ab ' -> '  a', ' ab', 'ab ')"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Two-level index sized by the vocabulary rather than the catalog:
+    trigram -> ids of words containing it, and word -> products using it.
+
+    A misspelled token is matched against distinct words only (tens of
+    thousands even for a million products), then the matching words'
+    postings give the products. Postings are packed as
+    ``product_id * 4 + field`` in int64 arrays to keep memory flat.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._words = []                     # word id -> word
+        self._word_ids = {}                  # word -> word id
+        self._gram_counts = array('H')       # word id -> number of trigrams
+        self._grams = defaultdict(lambda: array('i'))   # trigram -> word ids
+        self._postings = []                  # word id -> array of packed postings
+        self._documents = {}                 # product id -> array of word ids
+
+    def __len__(self):
+        return len(self._documents)
+
+    def rebuild(self):
+        rows = db.session.query(
+            Product.id, Product.name, Product.brand, Product.sku
+        ).filter(Product.is_active == True).yield_per(1000)
+
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(row.id, row)
+            return len(self._documents)
+
+    def index_product(self, product):
+        with self._lock:
+            self._remove(product.id)
+            if product.is_active:
+                self._add(product.id, product)
+
+    def _word_id(self, word):
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = len(self._words)
+            grams = trigrams(word)
+            self._words.append(word)
+            self._word_ids[word] = word_id
+            self._gram_counts.append(min(len(grams), 0xFFFF))
+            self._postings.append(array('q'))
+            for gram in grams:
+                self._grams[gram].append(word_id)
+        return word_id
+
+    def _add(self, product_id, source):
+        word_ids = set()
+        for field, (column, _) in enumerate(FUZZY_FIELDS):
+            for word in set(tokenize(getattr(source, column))):
+                word_id = self._word_id(word)
+                self._postings[word_id].append(product_id * 4 + field)
+                word_ids.add(word_id)
+        self._documents[product_id] = array('i', sorted(word_ids))
+
+    def _remove(self, product_id):
+        # Words stay in the vocabulary; empty postings are skipped at query time
+        for word_id in self._documents.pop(product_id, ()):
+            postings = self._postings[word_id]
+            self._postings[word_id] = array(
+                'q', (posting for posting in postings if posting // 4 != product_id)
+            )
+
+    def similar_words(self, token, threshold, limit):
+        """
+        Vocabulary words whose trigram similarity to ``token`` is at least
+        ``threshold``, as [(word id, similarity)] best first
+        """
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings:
+                shared.update(postings)
+
+        matches = []
+        for word_id, count in shared.items():
+            # Same measure as pg_trgm: |A & B| / |A | B|
+            similarity = count / (len(grams) + self._gram_counts[word_id] - count)
+            if similarity >= threshold and self._postings[word_id]:
+                matches.append((word_id, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:limit]
+
+    def search(self, term, threshold, expansions, limit):
+        """
+        Product ids ranked by similarity. Every query token must match at
+        least one similar word; a product's score is the sum over tokens
+        of its best (similarity x field weight).
+        """
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for word_id, similarity in self.similar_words(token, threshold, expansions):
+                    for posting in self._postings[word_id]:
+                        product_id, field = divmod(posting, 4)
+                        score = similarity * FUZZY_FIELDS[field][1]
+                        if score > token_scores[product_id]:
+                            token_scores[product_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        product_id: score + token_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in token_scores
+                    }
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [product_id for product_id, _ in ranked[:limit]]
+
+
+class FuzzySearch:
+    """
+    Fuzzy search facade.
+    The trigram index is built in-process on first use and kept in sync with
+    admin product writes through the ``product_saved`` signal.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FUZZY_SEARCH_THRESHOLD', 0.25)
+        app.config.setdefault('FUZZY_SEARCH_EXPANSIONS', 20)
+        app.extensions['fuzzy_index'] = None
+        product_saved.connect(self._on_product_saved)
+
+    @property
+    def index(self):
+        index = current_app.extensions.get('fuzzy_index')
+        if index is None:
+            with self._lock:
+                index = current_app.extensions.get('fuzzy_index')
+                if index is None:
+                    index = TrigramIndex()
+                    index.rebuild()
+                    current_app.extensions['fuzzy_index'] = index
+        return index
+
+    def rebuild(self):
+        """Rebuild the trigram index. Returns the number of products indexed."""
+        return self.index.rebuild()
+
+    def search(self, query, term):
+        """
+        Restrict a Product query to fuzzy matches.
+        Returns (query, ordering) like search_index.search.
+        """
+        config = current_app.config
+        product_ids = self.index.search(
+            term,
+            config['FUZZY_SEARCH_THRESHOLD'],
+            config['FUZZY_SEARCH_EXPANSIONS'],
+            config['SEARCH_MAX_RESULTS']
+        )
+        if not product_ids:
+            return query.filter(false()), None
+
+        ordering = case(
+            {product_id: position for position, product_id in enumerate(product_ids)},
+            value=Product.id
+        )
+        return query.filter(Product.id.in_(product_ids)), ordering
+
+    def _on_product_saved(self, sender, product, **extra):
+        index = sender.extensions.get('fuzzy_index')
+        if index is not None:
+            index.index_product(product)
+
+
+fuzzy_search = FuzzySearch()
@@ -0,0 +1,163 @@
+"""
+FlaskMarket Enterprise - Guest Carts
+Anonymous carts keyed by a signed token, kept in the guest_carts table
+with a TTL and merged into CartItem when the shopper logs in
+"""
+
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import case, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+from app.models import CartItem, GuestCart, Product
+
+
+TOKEN_HEADER = 'X-Cart-Token'
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+
+class GuestCarts:
+    """
+    Guest cart store
+    A cart is a {product_id: quantity} row under an opaque id; clients
+    hold the id signed with SECRET_KEY, so ids can't be guessed or forged.
+    Carts live in the database, so every worker sees them and response
+    caching can't evict them. Every write renews the GUEST_CART_TTL;
+    sweep() deletes carts past it.
+    """
+
+    def _serializer(self):
+        return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='guest-cart')
+
+    def new_token(self):
+        return self._serializer().dumps(secrets.token_urlsafe(12))
+
+    def request_token(self):
+        """The request's cart token if its signature checks out, else None"""
+        token = request.headers.get(TOKEN_HEADER) or (request.get_json(silent=True) or {}).get('cart_token')
+        if not token:
+            return None
+        try:
+            self._serializer().loads(token)
+        except BadSignature:
+            return None
+        return token
+
+    def _cart_id(self, token):
+        return self._serializer().loads(token)
+
+    def get(self, token):
+        """product id -> quantity; empty for a missing or expired cart"""
+        if token is None:
+            return {}
+        cart = db.session.get(GuestCart, self._cart_id(token))
+        if cart is None or cart.expires_at <= datetime.utcnow():
+            return {}
+        return {int(product_id): quantity for product_id, quantity in cart.lines.items()}
+
+    def save(self, token, lines):
+        """Store the cart (or drop it when empty) and commit"""
+        lines = {str(product_id): quantity for product_id, quantity in lines.items() if quantity > 0}
+        if not lines:
+            self.clear(token)
+            return
+
+        cart_id = self._cart_id(token)
+        cart = db.session.get(GuestCart, cart_id)
+        if cart is None:
+            cart = GuestCart(id=cart_id)
+            db.session.add(cart)
+        cart.lines = lines
+        cart.expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['GUEST_CART_TTL'])
+        db.session.commit()
+
+    def clear(self, token):
+        if token is not None:
+            db.session.execute(delete(GuestCart).where(GuestCart.id == self._cart_id(token)))
+            db.session.commit()
+
+    def sweep(self):
+        """Delete expired carts. Returns the number removed."""
+        result = db.session.execute(delete(GuestCart).where(GuestCart.expires_at <= datetime.utcnow()))
+        db.session.commit()
+        return result.rowcount
+
+    def merge(self, token, user_id):
+        """
+        Move a guest cart into a user's CartItem rows and drop it
+        Quantities for products already in the user's cart are added
+        together, capped at stock for products that track inventory.
+        Inactive, deleted or sold-out products are skipped, and at most
+        GUEST_CART_MAX_LINES lines are taken. Uses one bulk INSERT ... ON
+        CONFLICT where the database supports it. Commits; returns the
+        number of lines merged.
+        """
+        lines = self.get(token)
+        if not lines:
+            return 0
+
+        # product id -> stock cap, None when inventory isn't tracked
+        limits = {
+            product_id: stock_quantity if track_inventory else None
+            for product_id, stock_quantity, track_inventory in db.session.query(
+                Product.id, Product.stock_quantity, Product.track_inventory
+            ).filter(Product.id.in_(list(lines)), Product.is_active == True)
+        }
+        rows = []
+        for product_id, quantity in lines.items():
+            if product_id not in limits:
+                continue
+            if limits[product_id] is not None:
+                quantity = min(quantity, limits[product_id])
+            if quantity > 0:
+                rows.append({'user_id': user_id, 'product_id': product_id, 'quantity': quantity})
+        rows = rows[:current_app.config['GUEST_CART_MAX_LINES']]
+
+        if rows:
+            upsert = UPSERT_DIALECTS.get(db.engine.dialect.name)
+            if upsert is not None:
+                statement = upsert(CartItem).values(rows)
+                stock = {product_id: limit for product_id, limit in limits.items() if limit is not None}
+                # NULL for untracked products, which never caps
+                cap = case(stock, value=statement.excluded.product_id) if stock else None
+                db.session.execute(statement.on_conflict_do_update(
+                    index_elements=['user_id', 'product_id'],
+                    set_={'quantity': self._capped_sum(statement.excluded.quantity, cap)}
+                ))
+            else:
+                existing = dict(db.session.query(CartItem.product_id, CartItem.id).filter(
+                    CartItem.user_id == user_id,
+                    CartItem.product_id.in_([row['product_id'] for row in rows])
+                ))
+                new_rows = [row for row in rows if row['product_id'] not in existing]
+                if new_rows:
+                    db.session.execute(insert(CartItem), new_rows)
+                for row in rows:
+                    if row['product_id'] in existing:
+                        db.session.execute(update(CartItem).where(
+                            CartItem.id == existing[row['product_id']]
+                        ).values(quantity=self._capped_sum(row['quantity'], limits[row['product_id']])))
+
+        # Drop the guest cart in the same transaction as the merge
+        db.session.execute(delete(GuestCart).where(GuestCart.id == self._cart_id(token)))
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def _capped_sum(quantity, cap):
+        """SET value adding ``quantity`` to a CartItem row, capped at ``cap`` unless that is None"""
+        total = CartItem.quantity + quantity
+        if cap is None:
+            return total
+        return case((total > cap, cap), else_=total)
+
+guest_carts = GuestCarts()
@@ -0,0 +1,116 @@
+"""
+FlaskMarket Enterprise - Pricing
+One pass over a basket's lines for subtotal, coupon discount, shipping,
+tax and total; shared by the cart, coupon validation and checkout
+"""
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import CartItem, Product
+
+
+class PricingRules:
+    """Shipping and tax rules, built once per configuration"""
+
+    def __init__(self, free_shipping_threshold, shipping_rate, tax_rate):
+        self.key = (free_shipping_threshold, shipping_rate, tax_rate)
+        self.free_shipping_threshold = free_shipping_threshold
+        self.shipping_rate = shipping_rate
+        self.tax_rate = tax_rate
+
+    def shipping(self, subtotal):
+        if not subtotal or subtotal >= self.free_shipping_threshold:
+            return 0
+        return self.shipping_rate
+
+    def tax(self, subtotal):
+        return round(subtotal * self.tax_rate, 2)
+
+
+def pricing_rules():
+    """Rules for the current app, memoized in app.extensions until the config changes"""
+    config = current_app.config
+    key = (config['FREE_SHIPPING_THRESHOLD'], config['SHIPPING_FLAT_RATE'], config['TAX_RATE'])
+    rules = current_app.extensions.get('pricing_rules')
+    if rules is None or rules.key != key:
+        rules = PricingRules(*key)
+        current_app.extensions['pricing_rules'] = rules
+    return rules
+
+
+class Quote:
+    """A priced basket"""
+
+    def __init__(self, lines, item_count, subtotal, shipping, tax):
+        self.lines = lines  # product id -> line subtotal
+        self.item_count = item_count
+        self.subtotal = subtotal
+        self.discount = 0
+        self.shipping = shipping
+        self.tax = tax
+        self.total = round(subtotal + shipping + tax, 2)
+
+    def apply_coupon(self, coupon):
+        """Deduct a (validated, see coupon_error) coupon's discount"""
+        self.discount = round(coupon.calculate_discount(self.subtotal), 2)
+        self.total = round(self.subtotal - self.discount + self.shipping + self.tax, 2)
+        return self
+
+    def summary(self):
+        return {
+            'item_count': self.item_count,
+            'subtotal': self.subtotal,
+            'discount': self.discount,
+            'shipping': self.shipping,
+            'tax': self.tax,
+            'total': self.total
+        }
+
+
+def coupon_error(coupon, subtotal):
+    """Why a coupon can't be applied to this subtotal, or None if it can"""
+    is_valid, message = coupon.is_valid()
+    if not is_valid:
+        return message
+    if subtotal < (coupon.min_order_amount or 0):
+        return f'Minimum order amount is ${coupon.min_order_amount}'
+    return None
+
+
+def price_basket(lines, coupon=None, rules=None):
+    """
+    Price (product_id, unit_price, quantity) lines in a single pass
+    Shipping and tax are charged on the subtotal before any coupon
+    discount; ``coupon`` is applied as by Quote.apply_coupon.
+    """
+    rules = rules or pricing_rules()
+
+    line_totals = {}
+    item_count = 0
+    subtotal = 0
+    for product_id, unit_price, quantity in lines:
+        line_total = unit_price * quantity
+        line_totals[product_id] = line_total
+        item_count += quantity
+        subtotal += line_total
+    subtotal = round(subtotal, 2)
+
+    quote = Quote(line_totals, item_count, subtotal, rules.shipping(subtotal), rules.tax(subtotal))
+    return quote.apply_coupon(coupon) if coupon else quote
+
+
+def basket_prices(product_ids):
+    """Current price of each product, in one query"""
+    if not product_ids:
+        return {}
+    return dict(db.session.query(Product.id, Product.price).filter(Product.id.in_(set(product_ids))))
+
+
+def cart_lines(user_id):
+    """A user's cart as (product_id, unit_price, quantity) lines, from one joined query"""
+    return db.session.query(
+        CartItem.product_id, Product.price, CartItem.quantity
+    ).join(
+        Product, Product.id == CartItem.product_id
+    ).filter(CartItem.user_id == user_id).order_by(CartItem.id).all()
@@ -0,0 +1,55 @@
+"""
+FlaskMarket Enterprise - Rating Aggregates
+Bulk reconciliation of the denormalized rating columns on Product
+"""
+
+from collections import defaultdict
+from sqlalchemy import func, update
+from app.extensions import db
+from app.models import Product, Review
+
+
+def reconcile_ratings(batch_size=1000):
+    """
+    Recompute every product's rating aggregates from approved reviews
+    One GROUP BY over reviews, then batched UPDATEs by primary key.
+    Returns the number of products updated.
+    """
+    stars = defaultdict(dict)
+    rows = db.session.query(
+        Review.product_id, Review.rating, func.count(Review.id)
+    ).filter(
+        Review.is_approved == True
+    ).group_by(Review.product_id, Review.rating)
+
+    for product_id, rating, count in rows:
+        stars[product_id][rating] = count
+
+    updated = 0
+    batch = []
+    for (product_id,) in db.session.query(Product.id).yield_per(batch_size):
+        counts = stars.get(product_id, {})
+        rating_sum = sum(rating * count for rating, count in counts.items())
+        rating_count = sum(counts.values())
+
+        values = {
+            'id': product_id,
+            'rating_sum': rating_sum,
+            'rating_count': rating_count,
+            'rating_average': rating_sum / rating_count if rating_count else 0
+        }
+        for star in range(1, 6):
+            values[f'rating_{star}_count'] = counts.get(star, 0)
+        batch.append(values)
+
+        if len(batch) >= batch_size:
+            db.session.execute(update(Product), batch)
+            updated += len(batch)
+            batch = []
+
+    if batch:
+        db.session.execute(update(Product), batch)
+        updated += len(batch)
+
+    db.session.commit()
+    return updated
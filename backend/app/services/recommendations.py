@@ -0,0 +1,125 @@
+"""
+FlaskMarket Enterprise - Personalized Recommendations
+Scores the whole catalog for one user in a few array operations over the
+catalog snapshot, from their orders, cart and wishlist
+"""
+
+from collections import defaultdict
+
+from flask import current_app
+
+from app.extensions import db, cache
+from app.models import Order, OrderItem, CartItem, WishlistItem, ProductPair
+from app.models.product import product_categories
+from app.services.catalog import catalog, np
+
+
+# Interaction -> weight of the product as a taste signal
+SIGNAL_WEIGHTS = {
+    'order': 3.0,
+    'cart': 2.0,
+    'wishlist': 1.5
+}
+
+# Score component -> weight in the final blend (each component is scaled to 0..1)
+SCORE_WEIGHTS = {
+    'co_purchase': 0.45,
+    'category': 0.35,
+    'popularity': 0.12,
+    'rating': 0.08
+}
+
+
+def user_signals(user_id):
+    """product id -> summed interaction weight, from three small queries"""
+    signals = defaultdict(float)
+    ordered = db.session.query(OrderItem.product_id).join(
+        Order, Order.id == OrderItem.order_id
+    ).filter(Order.user_id == user_id)
+    for (product_id,) in ordered:
+        signals[product_id] += SIGNAL_WEIGHTS['order']
+    for (product_id,) in db.session.query(CartItem.product_id).filter(CartItem.user_id == user_id):
+        signals[product_id] += SIGNAL_WEIGHTS['cart']
+    for (product_id,) in db.session.query(WishlistItem.product_id).filter(WishlistItem.user_id == user_id):
+        signals[product_id] += SIGNAL_WEIGHTS['wishlist']
+    return signals
+
+
+def _scaled(values):
+    top = values.max() if len(values) else 0
+    return values / top if top > 0 else values
+
+
+def score_products(signals, limit):
+    """
+    Rank active, in-stock products the user hasn't interacted with
+    Returns product ids best first, or None when the catalog engine is off.
+    """
+    seed_ids = list(signals)
+
+    category_weights = defaultdict(float)
+    for product_id, category_id in db.session.query(
+        product_categories.c.product_id, product_categories.c.category_id
+    ).filter(product_categories.c.product_id.in_(seed_ids)):
+        category_weights[category_id] += signals[product_id]
+
+    pairs = db.session.query(
+        ProductPair.product_id, ProductPair.related_product_id, ProductPair.score
+    ).filter(ProductPair.product_id.in_(seed_ids)).all()
+
+    with catalog.reading() as snapshot:
+        if snapshot is None:
+            return None
+
+        size = len(snapshot)
+        category = np.zeros(size)
+        for category_id, weight in category_weights.items():
+            category[snapshot.categories.get(category_id, [])] += weight
+
+        co_purchase = np.zeros(size)
+        positions = [snapshot.positions.get(related_id) for _, related_id, _ in pairs]
+        found = [index for index, position in enumerate(positions) if position is not None]
+        if found:
+            np.add.at(
+                co_purchase,
+                [positions[index] for index in found],
+                [pairs[index][2] * signals[pairs[index][0]] for index in found]
+            )
+
+        score = (
+            SCORE_WEIGHTS['co_purchase'] * _scaled(co_purchase)
+            + SCORE_WEIGHTS['category'] * _scaled(category)
+            + SCORE_WEIGHTS['popularity'] * _scaled(np.log1p(snapshot.sold.astype(np.float64)))
+            + SCORE_WEIGHTS['rating'] * snapshot.rating / 5
+        )
+
+        eligible = snapshot.active & (snapshot.stock > 0) & ((category > 0) | (co_purchase > 0))
+        seen = [snapshot.positions[product_id] for product_id in seed_ids if product_id in snapshot.positions]
+        eligible[seen] = False
+
+        rows = np.flatnonzero(eligible)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-score[rows], limit - 1)[:limit]]
+        rows = rows[np.lexsort((-snapshot.ids[rows], -score[rows]))]
+        return snapshot.ids[rows].tolist()
+
+
+def recommend(user_id, limit):
+    """
+    Product ids for a user's feed, cached per user for
+    RECOMMENDATIONS_CACHE_TIMEOUT seconds
+    Returns (product_ids, strategy); product_ids is None for cold-start
+    users (no history) or when the catalog engine is off, and callers
+    fall back to bestsellers.
+    """
+    key = f'recommendations:{user_id}:{limit}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    signals = user_signals(user_id)
+    product_ids = score_products(signals, limit) if signals else None
+    result = (product_ids, 'personalized') if product_ids else (None, 'bestsellers')
+
+    cache.set(key, result, timeout=current_app.config['RECOMMENDATIONS_CACHE_TIMEOUT'])
+    return result
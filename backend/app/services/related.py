@@ -0,0 +1,182 @@
+"""
+FlaskMarket Enterprise - Frequently Bought Together
+Incremental item-item co-occurrence over order baskets, cosine-normalized
+"""
+
+import math
+from collections import defaultdict
+from itertools import permutations
+
+from sqlalchemy import delete, desc, insert, tuple_, update
+
+from app.extensions import db
+from app.models import Order, OrderItem, Product, ProductPair, ProductOrderCount, JobCheckpoint
+
+
+CHECKPOINT = 'related-products'
+
+# Orders in these states never count as co-purchases
+EXCLUDED_STATUSES = ('cancelled', 'refunded')
+
+# Baskets larger than this are skipped (bulk orders say little about pairs)
+MAX_BASKET = 50
+
+
+def _checkpoint():
+    checkpoint = db.session.get(JobCheckpoint, CHECKPOINT)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=CHECKPOINT, position=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+
+def _baskets(order_ids, max_basket):
+    """order id -> distinct product ids, skipping single-item and oversized baskets"""
+    baskets = defaultdict(set)
+    rows = db.session.query(OrderItem.order_id, OrderItem.product_id).filter(
+        OrderItem.order_id.in_(order_ids), OrderItem.product_id.isnot(None)
+    )
+    for order_id, product_id in rows:
+        baskets[order_id].add(product_id)
+    return [basket for basket in baskets.values() if 1 < len(basket) <= max_basket]
+
+
+def _apply(baskets, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) a chunk of baskets to the counts and
+    rescore every pair they touch; pairs whose count drops to zero are deleted
+    """
+    order_deltas = defaultdict(int)
+    pair_deltas = defaultdict(int)
+    for basket in baskets:
+        for product_id in basket:
+            order_deltas[product_id] += sign
+        for pair in permutations(basket, 2):
+            pair_deltas[pair] += sign
+    if not order_deltas:
+        return 0
+
+    touched = list(order_deltas)
+
+    # Order counts
+    counts = dict(db.session.query(ProductOrderCount.product_id, ProductOrderCount.order_count).filter(
+        ProductOrderCount.product_id.in_(touched)
+    ))
+    new_counts = [
+        {'product_id': product_id, 'order_count': delta}
+        for product_id, delta in order_deltas.items() if product_id not in counts
+    ]
+    changed_counts = [
+        {'product_id': product_id, 'order_count': counts[product_id] + delta}
+        for product_id, delta in order_deltas.items() if product_id in counts
+    ]
+    for row in new_counts + changed_counts:
+        counts[row['product_id']] = row['order_count']
+    dropped = [row['product_id'] for row in changed_counts if row['order_count'] <= 0]
+    changed_counts = [row for row in changed_counts if row['order_count'] > 0]
+    if new_counts:
+        db.session.execute(insert(ProductOrderCount), new_counts)
+    if changed_counts:
+        db.session.execute(update(ProductOrderCount), changed_counts)
+    if dropped:
+        db.session.execute(delete(ProductOrderCount).where(ProductOrderCount.product_id.in_(dropped)))
+
+    # Every pair of a touched product needs a new score, since its order count changed
+    pairs = {
+        (a, b): co_count
+        for a, b, co_count in db.session.query(
+            ProductPair.product_id, ProductPair.related_product_id, ProductPair.co_count
+        ).filter(ProductPair.product_id.in_(touched))
+    }
+    new_pairs = {pair for pair in pair_deltas if pair not in pairs}
+    for pair, delta in pair_deltas.items():
+        pairs[pair] = pairs.get(pair, 0) + delta
+
+    missing = {b for _, b in pairs if b not in counts}
+    if missing:
+        counts.update(db.session.query(
+            ProductOrderCount.product_id, ProductOrderCount.order_count
+        ).filter(ProductOrderCount.product_id.in_(missing)))
+
+    inserts, updates, deletes = [], [], []
+    for (a, b), co_count in pairs.items():
+        if co_count <= 0:
+            # Both directions are touched: a pair only drops with its basket
+            deletes.append((a, b))
+            continue
+        values = {
+            'product_id': a,
+            'related_product_id': b,
+            'co_count': co_count,
+            'score': co_count / math.sqrt(counts[a] * counts[b])
+        }
+        (inserts if (a, b) in new_pairs else updates).append(values)
+        # The mirrored pair's score changes too, even if b wasn't touched
+        if b not in order_deltas:
+            updates.append(dict(values, product_id=b, related_product_id=a))
+
+    if inserts:
+        db.session.execute(insert(ProductPair), inserts)
+    if updates:
+        db.session.execute(update(ProductPair), updates)
+    if deletes:
+        db.session.execute(delete(ProductPair).where(
+            tuple_(ProductPair.product_id, ProductPair.related_product_id).in_(deletes)
+        ))
+    return len(baskets)
+
+
+def build_related(batch_size=500, max_basket=MAX_BASKET, full=False):
+    """
+    Fold orders placed since the last run into the co-occurrence table
+    Each chunk of orders and the checkpoint are committed together, so an
+    interrupted run resumes where it stopped. ``full`` starts over from the
+    first order. Returns the number of baskets processed.
+    """
+    if full:
+        db.session.query(ProductPair).delete()
+        db.session.query(ProductOrderCount).delete()
+        _checkpoint().position = 0
+        db.session.commit()
+
+    processed = 0
+    while True:
+        checkpoint = _checkpoint()
+        order_ids = [order_id for (order_id,) in db.session.query(Order.id).filter(
+            Order.id > checkpoint.position, Order.status.notin_(EXCLUDED_STATUSES)
+        ).order_by(Order.id).limit(batch_size)]
+        if not order_ids:
+            break
+
+        processed += _apply(_baskets(order_ids, max_basket))
+        checkpoint.position = order_ids[-1]
+        db.session.commit()
+
+    return processed
+
+
+def order_status_changed(order, previous_status):
+    """
+    Keep an already-folded order's co-purchases in step with its status
+    Moving into EXCLUDED_STATUSES subtracts the basket, moving back out adds
+    it again. Orders past the checkpoint are left to build_related, which
+    checks the status when it reaches them. Commit together with the status.
+    """
+    counted_before = previous_status not in EXCLUDED_STATUSES
+    counted_now = order.status not in EXCLUDED_STATUSES
+    if counted_before == counted_now:
+        return 0
+    checkpoint = db.session.get(JobCheckpoint, CHECKPOINT)
+    if checkpoint is None or order.id > checkpoint.position:
+        return 0
+    return _apply(_baskets([order.id], MAX_BASKET), 1 if counted_now else -1)
+
+
+def related_product_ids(product_id, limit):
+    """Best co-purchased active products for one product: one index range scan"""
+    rows = db.session.query(ProductPair.related_product_id).join(
+        Product, Product.id == ProductPair.related_product_id
+    ).filter(
+        ProductPair.product_id == product_id, Product.is_active == True
+    ).order_by(desc(ProductPair.score), desc(ProductPair.co_count)).limit(limit)
+    return [related_id for (related_id,) in rows]
@@ -0,0 +1,339 @@
+"""
+FlaskMarket Enterprise - Product Search Index
+Full-text product search backed by SQLite FTS5, PostgreSQL tsvector,
+or an in-process inverted index when neither is available
+"""
+
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import Float, Integer, case, false, func, literal_column, text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models import Product
+from app.signals import product_saved
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Indexed columns and their relevance weights, in FTS column order
+FIELD_WEIGHTS = (
+    ('name', 10.0),
+    ('brand', 5.0),
+    ('sku', 5.0),
+    ('description', 1.0),
+)
+
+
+def tokenize(value):
+    """Split text into lowercase search tokens"""
+    return TOKEN_RE.findall((value or '').lower())
+
+
+def _indexable_rows():
+    """Yield (id, name, brand, sku, description) for every active product"""
+    return db.session.query(
+        Product.id, Product.name, Product.brand, Product.sku, Product.description
+    ).filter(Product.is_active == True).yield_per(1000)
+
+
+class SQLiteFTSBackend:
+    """SQLite FTS5 virtual table keyed by product id"""
+    name = 'fts5'
+    table = 'products_fts'
+
+    def ensure(self):
+        """Create the FTS table. Returns True if it was just created."""
+        with db.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': self.table}
+            ).first()
+            if exists:
+                return False
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                f"name, brand, sku, description, tokenize = 'porter unicode61')"
+            ))
+        return True
+
+    def rebuild(self):
+        db.session.execute(text(f'DELETE FROM {self.table}'))
+        insert = text(
+            f'INSERT INTO {self.table} (rowid, name, brand, sku, description) '
+            f'VALUES (:id, :name, :brand, :sku, :description)'
+        )
+        count = 0
+        batch = []
+        for row in _indexable_rows():
+            batch.append(dict(row._mapping))
+            if len(batch) >= 500:
+                db.session.execute(insert, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert, batch)
+            count += len(batch)
+        db.session.commit()
+        return count
+
+    def index_product(self, product):
+        db.session.execute(
+            text(f'DELETE FROM {self.table} WHERE rowid = :id'), {'id': product.id}
+        )
+        if product.is_active:
+            db.session.execute(
+                text(
+                    f'INSERT INTO {self.table} (rowid, name, brand, sku, description) '
+                    f'VALUES (:id, :name, :brand, :sku, :description)'
+                ),
+                {
+                    'id': product.id,
+                    'name': product.name,
+                    'brand': product.brand,
+                    'sku': product.sku,
+                    'description': product.description
+                }
+            )
+        db.session.commit()
+
+    def apply(self, query, term, limit):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.filter(false()), None
+
+        # Every token must match, each as a prefix ("iph" finds "iphone")
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(weight) for _, weight in FIELD_WEIGHTS)
+        hits = text(
+            f'SELECT rowid AS product_id, bm25({self.table}, {weights}) AS rank '
+            f'FROM {self.table} WHERE {self.table} MATCH :match'
+        ).bindparams(match=match).columns(
+            product_id=Integer, rank=Float
+        ).subquery('search_hits')
+
+        query = query.join(hits, hits.c.product_id == Product.id)
+        # bm25() scores are negative; lower is more relevant
+        return query, hits.c.rank.asc()
+
+
+class PostgresBackend:
+    """PostgreSQL tsvector search over a GIN expression index"""
+    name = 'postgres'
+    index_name = 'ix_products_search_document'
+
+    # Must stay identical to the indexed expression so the planner uses it
+    document = (
+        "setweight(to_tsvector('english', coalesce(products.name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(products.brand, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(products.sku, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(products.description, '')), 'D')"
+    )
+
+    def ensure(self):
+        """Create the GIN index. The index is maintained by PostgreSQL itself."""
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} '
+                f'ON products USING GIN (({self.document}))'
+            ))
+        return False
+
+    def rebuild(self):
+        db.session.execute(text(f'REINDEX INDEX {self.index_name}'))
+        db.session.commit()
+        return Product.query.filter(Product.is_active == True).count()
+
+    def index_product(self, product):
+        # Expression index is updated by the UPDATE/INSERT itself
+        pass
+
+    def apply(self, query, term, limit):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.filter(false()), None
+
+        document = literal_column(self.document)
+        ts_query = func.to_tsquery('english', ' & '.join(f'{token}:*' for token in tokens))
+        query = query.filter(document.op('@@')(ts_query))
+        return query, func.ts_rank(document, ts_query).desc()
+
+
+class MemoryBackend:
+    """In-process inverted index used when the database has no full-text support"""
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)   # token -> {product_id: weight}
+        self._documents = {}                 # product_id -> set of tokens
+        self._vocabulary = []                # sorted tokens, for prefix lookups
+        self._built = False
+
+    def ensure(self):
+        return not self._built
+
+    def rebuild(self):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            for row in _indexable_rows():
+                self._add(row.id, row)
+            self._vocabulary = sorted(self._postings)
+            self._built = True
+            return len(self._documents)
+
+    def index_product(self, product):
+        with self._lock:
+            self._remove(product.id)
+            if product.is_active:
+                for token in self._add(product.id, product):
+                    index = bisect_left(self._vocabulary, token)
+                    if index == len(self._vocabulary) or self._vocabulary[index] != token:
+                        insort(self._vocabulary, token)
+
+    def _add(self, product_id, source):
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(getattr(source, field)):
+                weights[token] += weight
+        for token, weight in weights.items():
+            self._postings[token][product_id] = weight
+        self._documents[product_id] = set(weights)
+        return weights.keys()
+
+    def _remove(self, product_id):
+        # Emptied tokens stay in the vocabulary and are skipped at query time
+        for token in self._documents.pop(product_id, ()):
+            self._postings[token].pop(product_id, None)
+
+    def _expand(self, token, max_expansions=50):
+        """Vocabulary tokens starting with ``token``"""
+        start = bisect_left(self._vocabulary, token)
+        matches = []
+        for candidate in self._vocabulary[start:]:
+            if not candidate.startswith(token) or len(matches) >= max_expansions:
+                break
+            if self._postings.get(candidate):
+                matches.append(candidate)
+        return matches
+
+    def search(self, term, limit):
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for candidate in self._expand(token):
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + total / len(postings))
+                    for product_id, weight in postings.items():
+                        token_scores[product_id] += weight * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    # Every token must match
+                    scores = {
+                        product_id: score + token_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in token_scores
+                    }
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [product_id for product_id, _ in ranked[:limit]]
+
+    def apply(self, query, term, limit):
+        product_ids = self.search(term, limit)
+        if not product_ids:
+            return query.filter(false()), None
+
+        ordering = case(
+            {product_id: position for position, product_id in enumerate(product_ids)},
+            value=Product.id
+        )
+        return query.filter(Product.id.in_(product_ids)), ordering
+
+
+class SearchIndex:
+    """
+    Product search facade.
+    Picks a backend for the bound database on first use and keeps it in sync
+    with admin product writes through the ``product_saved`` signal.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        app.config.setdefault('SEARCH_MAX_RESULTS', 1000)
+        app.extensions['search_index'] = None
+        product_saved.connect(self._on_product_saved)
+
+    @property
+    def backend(self):
+        """Backend for the current app, created (and filled) on first access"""
+        backend = current_app.extensions.get('search_index')
+        if backend is None:
+            with self._lock:
+                backend = current_app.extensions.get('search_index')
+                if backend is None:
+                    backend = self._create_backend()
+                    current_app.extensions['search_index'] = backend
+        return backend
+
+    def _create_backend(self):
+        choice = current_app.config['SEARCH_BACKEND']
+        if choice == 'auto':
+            choice = {'sqlite': 'fts5', 'postgresql': 'postgres'}.get(
+                db.engine.dialect.name, 'memory'
+            )
+
+        backends = {
+            'fts5': SQLiteFTSBackend,
+            'postgres': PostgresBackend,
+            'memory': MemoryBackend
+        }
+        backend = backends.get(choice, MemoryBackend)()
+        try:
+            created = backend.ensure()
+        except OperationalError:
+            # e.g. SQLite compiled without FTS5
+            current_app.logger.warning('Search backend %s unavailable, using memory index', choice)
+            backend = MemoryBackend()
+            created = backend.ensure()
+
+        if created:
+            backend.rebuild()
+        return backend
+
+    def rebuild(self):
+        """Rebuild the index from the products table. Returns the number of products indexed."""
+        return self.backend.rebuild()
+
+    def search(self, query, term):
+        """
+        Restrict a Product query to search matches.
+        Returns (query, ordering) where ordering sorts the results by relevance.
+        SEARCH_MAX_RESULTS caps the candidate set of the memory backend only.
+        """
+        return self.backend.apply(query, term, current_app.config['SEARCH_MAX_RESULTS'])
+
+    def _on_product_saved(self, sender, product, **extra):
+        self.backend.index_product(product)
+
+
+search_index = SearchIndex()
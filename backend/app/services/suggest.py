@@ -0,0 +1,255 @@
+"""
+FlaskMarket Enterprise - Search Suggestions
+Prefix autocomplete over product names, brands and categories from a
+sorted in-memory key array, ranked by units sold
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Product, Category
+from app.models.product import product_categories
+from app.services.search import TOKEN_RE
+from app.signals import category_saved, inventory_changed, product_saved
+
+
+# Kind -> response key
+SUGGESTION_KINDS = {
+    'product': 'products',
+    'brand': 'brands',
+    'category': 'categories'
+}
+
+
+def _keys(text):
+    """Lowercased suffixes of text starting at each word, so 'gal' finds 'Samsung Galaxy'"""
+    lowered = (text or '').lower()
+    return sorted({lowered[match.start():] for match in TOKEN_RE.finditer(lowered)})
+
+
+class SuggestIndex:
+    """
+    Sorted array of (key, kind, ref) entries; a prefix maps to one
+    contiguous slice found by binary search. Scores live apart from the keys
+    so sales updates never re-sort anything. Results for one- and
+    two-character prefixes, whose slices are the widest, are memoized until
+    the next product or category write (sales alone don't reset them).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._entries = []                       # sorted (key, kind, ref)
+        self._docs = {}                          # (kind, ref) -> (keys, payload)
+        self._scores = defaultdict(int)          # (kind, ref) -> units sold
+        self._products = {}                      # product id -> (brand, sold, category ids)
+        self._brand_products = defaultdict(int)  # brand -> number of active products
+        self._memo = {}
+
+    def rebuild(self):
+        """Load every active product, brand and category. Returns the number of entries."""
+        with self._lock:
+            self._reset()
+
+            memberships = defaultdict(set)
+            for product_id, category_id in db.session.query(
+                product_categories.c.product_id, product_categories.c.category_id
+            ):
+                memberships[product_id].add(category_id)
+
+            rows = db.session.query(
+                Product.id, Product.name, Product.slug, Product.brand, Product.sold_count
+            ).filter(Product.is_active == True).yield_per(1000)
+            for row in rows:
+                self._set_product(row, memberships[row.id])
+
+            for category in Category.query.filter_by(is_active=True):
+                self._set_doc('category', category.id, category.name, {'slug': category.slug})
+
+            self._entries.sort()
+            return len(self._entries)
+
+    # ============ Writes ============
+
+    def _set_doc(self, kind, ref, text, payload, sort=False):
+        """Replace the entries of one document; ``sort`` keeps the array ordered"""
+        self._drop_doc(kind, ref)
+        keys = _keys(text)
+        self._docs[(kind, ref)] = (keys, dict(payload, text=text))
+        for key in keys:
+            if sort:
+                insort(self._entries, (key, kind, ref))
+            else:
+                self._entries.append((key, kind, ref))
+
+    def _drop_doc(self, kind, ref):
+        doc = self._docs.pop((kind, ref), None)
+        if doc is None:
+            return
+        for key in doc[0]:
+            index = bisect_left(self._entries, (key, kind, ref))
+            if index < len(self._entries) and self._entries[index] == (key, kind, ref):
+                del self._entries[index]
+
+    def _set_product(self, product, category_ids, sort=False):
+        self._forget_product(product.id)
+        sold = product.sold_count or 0
+        self._products[product.id] = (product.brand, sold, set(category_ids))
+        self._scores[('product', product.id)] = sold
+        self._set_doc('product', product.id, product.name, {'id': product.id, 'slug': product.slug}, sort)
+
+        if product.brand:
+            if ('brand', product.brand) not in self._docs:
+                self._set_doc('brand', product.brand, product.brand, {}, sort)
+            self._brand_products[product.brand] += 1
+            self._scores[('brand', product.brand)] += sold
+        for category_id in category_ids:
+            self._scores[('category', category_id)] += sold
+
+    def _forget_product(self, product_id):
+        """Remove a product's sales from its brand and category totals"""
+        previous = self._products.pop(product_id, None)
+        if previous is None:
+            return
+        brand, sold, category_ids = previous
+        if brand:
+            self._scores[('brand', brand)] -= sold
+            self._brand_products[brand] -= 1
+            if not self._brand_products[brand]:
+                self._drop_doc('brand', brand)
+        for category_id in category_ids:
+            self._scores[('category', category_id)] -= sold
+
+    def index_product(self, product):
+        with self._lock:
+            self._memo.clear()
+            if product.is_active:
+                self._set_product(product, [c.id for c in product.categories], sort=True)
+            else:
+                self._forget_product(product.id)
+                self._drop_doc('product', product.id)
+
+    def update_sales(self, products):
+        with self._lock:
+            for product in products:
+                previous = self._products.get(product.id)
+                if previous is None:
+                    continue
+                brand, sold, category_ids = previous
+                delta = (product.sold_count or 0) - sold
+                self._products[product.id] = (brand, sold + delta, category_ids)
+                self._scores[('product', product.id)] += delta
+                if brand:
+                    self._scores[('brand', brand)] += delta
+                for category_id in category_ids:
+                    self._scores[('category', category_id)] += delta
+
+    def index_category(self, category):
+        with self._lock:
+            self._memo.clear()
+            if category.is_active:
+                self._set_doc('category', category.id, category.name, {'slug': category.slug}, sort=True)
+            else:
+                self._drop_doc('category', category.id)
+
+    # ============ Reads ============
+
+    def suggest(self, prefix, limit):
+        """Top ``limit`` suggestions of each kind for a prefix, best selling first"""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return {group: [] for group in SUGGESTION_KINDS.values()}
+
+        memo_key = (prefix, limit)
+        with self._lock:
+            result = self._memo.get(memo_key)
+            if result is not None:
+                return result
+
+            matches = {kind: set() for kind in SUGGESTION_KINDS}
+            index = bisect_left(self._entries, (prefix,))
+            while index < len(self._entries):
+                key, kind, ref = self._entries[index]
+                if not key.startswith(prefix):
+                    break
+                matches[kind].add(ref)
+                index += 1
+
+            result = {}
+            for kind, refs in matches.items():
+                # Highest score first; on ties, shorter (closer) text first
+                best = heapq.nsmallest(
+                    limit, refs,
+                    key=lambda ref: (-self._scores[(kind, ref)], len(self._docs[(kind, ref)][1]['text']))
+                )
+                result[SUGGESTION_KINDS[kind]] = [self._docs[(kind, ref)][1] for ref in best]
+
+            if len(prefix) <= 2:
+                self._memo[memo_key] = result
+        return result
+
+
+class Suggestions:
+    """
+    Autocomplete facade.
+    The index is built on startup (or first use) per process and follows
+    product, sales and category writes through signals.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SUGGEST_LIMIT', 5)
+        app.extensions['suggest_index'] = None
+        product_saved.connect(self._on_product_saved)
+        inventory_changed.connect(self._on_inventory_changed)
+        category_saved.connect(self._on_category_saved)
+
+    @property
+    def index(self):
+        index = current_app.extensions.get('suggest_index')
+        if index is None:
+            with self._lock:
+                index = current_app.extensions.get('suggest_index')
+                if index is None:
+                    self.rebuild()
+                    index = current_app.extensions['suggest_index']
+        return index
+
+    def rebuild(self):
+        """Build a fresh index and swap it in. Returns the number of entries."""
+        index = SuggestIndex()
+        count = index.rebuild()
+        current_app.extensions['suggest_index'] = index
+        return count
+
+    def suggest(self, prefix, limit=None):
+        return self.index.suggest(prefix, limit or current_app.config['SUGGEST_LIMIT'])
+
+    def _on_product_saved(self, sender, product, **extra):
+        index = sender.extensions.get('suggest_index')
+        if index is not None:
+            index.index_product(product)
+
+    def _on_inventory_changed(self, sender, products, **extra):
+        index = sender.extensions.get('suggest_index')
+        if index is not None:
+            index.update_sales(products)
+
+    def _on_category_saved(self, sender, category, **extra):
+        index = sender.extensions.get('suggest_index')
+        if index is not None:
+            index.index_category(category)
+
+
+suggestions = Suggestions()
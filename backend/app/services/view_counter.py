@@ -0,0 +1,174 @@
+"""
+FlaskMarket Enterprise - Buffered View Counter
+Write-behind buffer for product view counts, so product pages stay reads
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import case, update
+
+from app.extensions import db
+from app.models import Product
+
+
+class _Shard:
+    """One lock-protected slice of the buffer"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+
+
+class ViewCounter:
+    """
+    Buffers view increments in memory and writes them to Product.view_count
+    in one batched UPDATE per flush interval.
+
+    Each worker process keeps its own buffer; inside a process the buffer is
+    split into shards by product id so concurrent requests rarely contend
+    on the same lock. The flusher thread is started lazily in the worker
+    (after any fork) and the buffer is flushed once more at interpreter exit.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._shards = []
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.flush_count = 0
+        self.last_flush_at = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_COUNTER_FLUSH_INTERVAL', 10)
+        app.config.setdefault('VIEW_COUNTER_SHARDS', 16)
+        app.config.setdefault('VIEW_COUNTER_BATCH_SIZE', 500)
+        app.extensions['view_counter'] = self
+
+        self._app = app
+        self._shards = [_Shard() for _ in range(app.config['VIEW_COUNTER_SHARDS'])]
+        atexit.register(self._flush_at_exit)
+
+    @property
+    def interval(self):
+        return self._app.config['VIEW_COUNTER_FLUSH_INTERVAL']
+
+    def increment(self, product_id, amount=1):
+        """Record a view. Writes through immediately if buffering is disabled."""
+        shard = self._shards[product_id % len(self._shards)]
+        with shard.lock:
+            shard.counts[product_id] += amount
+
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self):
+        """Total increments not yet written to the database"""
+        total = 0
+        for shard in self._shards:
+            with shard.lock:
+                total += sum(shard.counts.values())
+        return total
+
+    def _drain(self):
+        """Swap out every shard's counts and merge them"""
+        merged = defaultdict(int)
+        for shard in self._shards:
+            with shard.lock:
+                counts, shard.counts = shard.counts, defaultdict(int)
+            for product_id, amount in counts.items():
+                merged[product_id] += amount
+        return merged
+
+    def _restore(self, counts):
+        for product_id, amount in counts.items():
+            shard = self._shards[product_id % len(self._shards)]
+            with shard.lock:
+                shard.counts[product_id] += amount
+
+    def flush(self):
+        """
+        Write buffered increments with one UPDATE ... CASE statement per batch
+        Requires an app context. Returns the number of products updated.
+        """
+        counts = self._drain()
+        if not counts:
+            return 0
+
+        product_ids = list(counts)
+        batch_size = self._app.config['VIEW_COUNTER_BATCH_SIZE']
+        try:
+            for start in range(0, len(product_ids), batch_size):
+                batch = product_ids[start:start + batch_size]
+                db.session.execute(
+                    update(Product)
+                    .where(Product.id.in_(batch))
+                    .values(
+                        view_count=Product.view_count + case(
+                            {product_id: counts[product_id] for product_id in batch},
+                            value=Product.id
+                        ),
+                        # Views aren't edits: keep onupdate from bumping updated_at
+                        updated_at=Product.updated_at
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the increments for the next attempt
+            self._restore(counts)
+            raise
+
+        self.flush_count += 1
+        self.last_flush_at = time.time()
+        return len(product_ids)
+
+    def stats(self):
+        return {
+            'pending_increments': self.pending(),
+            'flush_interval': self.interval,
+            'flush_count': self.flush_count,
+            'last_flush_at': self.last_flush_at
+        }
+
+    def _ensure_flusher(self):
+        # A forked worker inherits the object but not the thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='view-counter-flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception:
+                self._app.logger.exception('View counter flush failed')
+
+    def _flush_at_exit(self):
+        self._stop.set()
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception:
+            self._app.logger.exception('View counter flush at exit failed')
+
+
+view_counter = ViewCounter()
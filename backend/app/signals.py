@@ -0,0 +1,24 @@
+"""
+FlaskMarket Enterprise - Application Signals
+Write notifications that keep in-process indexes in sync with the database
+"""
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent after a product has been created, updated or soft-deleted and committed.
+# Receivers get the application as sender and the product as ``product``.
+product_saved = _signals.signal('product-saved')
+
+# Sent after stock or sold counts changed through checkout or cancellation.
+# Receivers get the application as sender and the products as ``products``.
+inventory_changed = _signals.signal('inventory-changed')
+
+# Sent after a review was created, moderated or deleted and committed.
+# Receivers get the application as sender and the product as ``product``.
+review_saved = _signals.signal('review-saved')
+
+# Sent after a category was created or updated and committed.
+# Receivers get the application as sender and the category as ``category``.
+category_saved = _signals.signal('category-saved')
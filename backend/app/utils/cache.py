@@ -0,0 +1,189 @@
+"""
+FlaskMarket Enterprise - Response Cache
+Read-through caching of public catalog responses with tag-based purging
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from flask_caching.backends.base import BaseCache
+
+from app.extensions import cache
+from app.signals import category_saved, inventory_changed, product_saved, review_saved
+from app.utils.etags import is_fresh, make_etag, not_modified
+
+
+class LRUCache(BaseCache):
+    """
+    Thread-safe in-process LRU backend for Flask-Caching
+    Use with CACHE_TYPE = 'app.utils.cache.LRUCache'. Evicts the least
+    recently used entry once CACHE_THRESHOLD items are stored.
+    """
+
+    def __init__(self, threshold=500, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self._threshold = threshold
+        self._items = OrderedDict()  # key -> (expires_at, pickled value)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(threshold=config['CACHE_THRESHOLD'])
+        return cls(*args, **kwargs)
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0
+
+    def _live(self, key):
+        """Entry for key if present and not expired; caller holds the lock"""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, _ = item
+        if expires_at and expires_at <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item
+
+    def _store(self, key, value, timeout):
+        self._items[key] = (self._expires_at(timeout), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._items.move_to_end(key)
+        while len(self._items) > self._threshold:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+        return pickle.loads(item[1]) if item else None
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._store(key, value, timeout)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._live(key):
+                return False
+            self._store(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._items.pop(key, None) is not None
+
+    def has(self, key):
+        with self._lock:
+            return self._live(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+        return True
+
+
+# ============ Tags ============
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def tag_versions(tags):
+    """
+    Current version of each tag
+    Versions are part of every cache key, so bumping a tag's version makes
+    all entries stored under the old one unreachable (they then age out).
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(*keys)
+    missing = {key: time.time_ns() for key, version in zip(keys, versions) if version is None}
+    if missing:
+        cache.set_many(missing, timeout=0)
+    return [version or missing[key] for key, version in zip(keys, versions)]
+
+
+def purge_tags(*tags):
+    """Invalidate every cached response stored under any of the tags"""
+    cache.set_many({_tag_key(tag): time.time_ns() for tag in tags}, timeout=0)
+
+
+def _response_key(tags):
+    args = sorted(request.args.items(multi=True))
+    raw = repr((request.path, args, tag_versions(tags)))
+    return 'view:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_response(*tags, timeout=None):
+    """
+    Cache successful GET responses keyed on path + normalized query args
+    Only use on endpoints whose body doesn't depend on the current user.
+    Entries are dropped when any of the tags is purged. Each entry keeps
+    the ETag of its body, so If-None-Match hits are answered with a 304.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config['RESPONSE_CACHE_ENABLED']:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code == 200:
+                    response.add_etag()
+                return response.make_conditional(request)
+
+            key = _response_key(tags)
+            hit = cache.get(key)
+            if hit is not None:
+                body, status, mimetype, etag = hit
+                if is_fresh(etag):
+                    response = not_modified(etag)
+                else:
+                    response = current_app.response_class(body, status=status, mimetype=mimetype)
+                    response.set_etag(etag)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                body = response.get_data()
+                etag = make_etag(key, hashlib.sha1(body).hexdigest())
+                cache.set(
+                    key,
+                    (body, response.status_code, response.mimetype, etag),
+                    timeout=timeout if timeout is not None else current_app.config['RESPONSE_CACHE_TIMEOUT']
+                )
+                response.set_etag(etag)
+                response = response.make_conditional(request)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
+
+
+# ============ Write-driven invalidation ============
+
+@product_saved.connect
+def _purge_on_product_saved(sender, **extra):
+    # Category responses embed product counts
+    purge_tags('products', 'categories')
+
+
+@inventory_changed.connect
+def _purge_on_inventory_changed(sender, **extra):
+    purge_tags('products')
+
+
+@review_saved.connect
+def _purge_on_review_saved(sender, **extra):
+    purge_tags('products')
+
+
+@category_saved.connect
+def _purge_on_category_saved(sender, **extra):
+    # Product responses embed their categories
+    purge_tags('products', 'categories')
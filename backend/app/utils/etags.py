@@ -0,0 +1,65 @@
+"""
+FlaskMarket Enterprise - ETags
+Strong validators built from row timestamps and counts, so conditional
+GETs can be answered with 304 before the response body is serialized
+"""
+
+import hashlib
+
+from flask import current_app, request
+
+from app.extensions import db
+from app.models import Category
+from app.models.product import product_categories
+
+
+# Live view count on product detail responses, outside the ETag
+VIEW_COUNT_HEADER = 'X-View-Count'
+
+
+def make_etag(*parts):
+    """Hash the given version parts into an opaque ETag value"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def is_fresh(etag):
+    """True if the request's If-None-Match already names this version"""
+    return etag in request.if_none_match
+
+
+def not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return response
+
+
+def product_etag(product, fields=None):
+    """
+    Version of a product detail response
+    The body embeds the product's categories with their product counts,
+    so those are read with one query alongside the product row.
+    view_count is left out: it changes on every read, and is sent fresh
+    in the X-View-Count header instead.
+    """
+    categories = db.session.query(
+        Category.id, Category.updated_at, Category.product_count
+    ).join(
+        product_categories, product_categories.c.category_id == Category.id
+    ).filter(
+        product_categories.c.product_id == product.id
+    ).order_by(Category.id).all()
+
+    return make_etag(
+        'product', product.id, product.updated_at,
+        [tuple(row) for row in categories], sorted(fields or ())
+    )
+
+
+def order_etag(order, fields=None):
+    """Order items are immutable once placed; status changes bump updated_at"""
+    return make_etag('order', order.id, order.updated_at, sorted(fields or ()))
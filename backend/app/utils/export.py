@@ -0,0 +1,63 @@
+"""
+FlaskMarket Enterprise - Catalog Export
+Generators that stream products as NDJSON or CSV in fixed-size batches
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from app.utils.serializers import serialize_products
+
+
+def iter_batches(query, batch_size):
+    """Run the query once with yield_per and hand out lists of batch_size rows"""
+    rows = iter(query.yield_per(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _serialized(query, names, batch_size):
+    for batch in iter_batches(query, batch_size):
+        yield from serialize_products(batch, fields=names)
+
+
+def _flatten(value):
+    """CSV cell for a serialized value; nested categories/images become ';'-joined lists"""
+    if isinstance(value, list):
+        return ';'.join(
+            str(item.get('slug') or item.get('image_url') or '') if isinstance(item, dict) else str(item)
+            for item in value
+        )
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(',', ':'))
+    return '' if value is None else value
+
+
+def ndjson_rows(query, names, batch_size=500):
+    """One JSON document per line"""
+    for product in _serialized(query, names, batch_size):
+        yield json.dumps(product, separators=(',', ':'), default=str) + '\n'
+
+
+def csv_rows(query, names, batch_size=500):
+    """Header line, then one CSV line per product"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        # Hand out what was written and reuse the buffer
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(names)
+    yield drain()
+    for product in _serialized(query, names, batch_size):
+        writer.writerow([_flatten(product[name]) for name in names])
+        yield drain()
@@ -0,0 +1,58 @@
+"""
+FlaskMarket Enterprise - Sparse Fieldsets
+Parsing of the ``fields=`` query argument and the matching column loads
+"""
+
+from flask import abort
+from sqlalchemy.orm import load_only
+
+from app.models import Product, Order
+from app.models.order import ORDER_FIELDS
+from app.models.product import PRODUCT_FIELDS
+
+
+def parse_fields(args, allowed):
+    """
+    Parse ``fields=name,price,...`` into a set of keys
+    Returns None when the argument is absent (default fields); aborts with
+    400 on unknown names
+    """
+    raw = args.get('fields')
+    if raw is None:
+        return None
+
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(fields - set(allowed))
+    if unknown:
+        abort(400, description=f'Unknown fields: {", ".join(unknown)}')
+    return fields
+
+
+def parse_product_fields(args):
+    return parse_fields(args, PRODUCT_FIELDS)
+
+
+def parse_order_fields(args):
+    return parse_fields(args, ORDER_FIELDS)
+
+
+def _load_only(model, field_table, fields, extra):
+    if fields is None:
+        return []
+    columns = {'id', *extra}
+    for name in fields:
+        columns.update(field_table[name][0])
+    return [load_only(*(getattr(model, column) for column in sorted(columns)))]
+
+
+def product_load_options(fields, *extra):
+    """
+    Query options loading only the columns the requested product fields
+    read, plus any ``extra`` column names (e.g. a keyset sort column)
+    """
+    return _load_only(Product, PRODUCT_FIELDS, fields, extra)
+
+
+def order_load_options(fields, *extra):
+    """Same as product_load_options, for orders"""
+    return _load_only(Order, ORDER_FIELDS, fields, extra)
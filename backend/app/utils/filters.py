@@ -0,0 +1,67 @@
+"""
+FlaskMarket Enterprise - Query Filters
+Shared product filtering for catalog, facet and export endpoints
+"""
+
+from app.models import Product, Category
+from app.services import descendant_ids, fuzzy_search, search_index
+
+
+def filter_products(args):
+    """
+    Build the active-product query for the /products filter arguments
+    ---
+    Arguments:
+        - category: string (category slug; includes its subcategories)
+        - search: string (search query)
+        - fuzzy: boolean (typo-tolerant search on name, brand and SKU)
+        - min_price: float
+        - max_price: float
+        - brand: string
+        - in_stock: boolean
+        - featured: boolean
+    Returns: (query, relevance) where relevance orders search matches
+             best-first, or None when there is no search term
+    """
+    query = Product.query.filter(Product.is_active == True)
+    
+    # Filter by category
+    category_slug = args.get('category')
+    if category_slug:
+        category = Category.query.filter_by(slug=category_slug).first()
+        if category:
+            query = query.filter(Product.categories.any(Category.id.in_(descendant_ids(category.id))))
+    
+    # Search (full-text index, or trigram similarity when fuzzy, ranked by relevance)
+    search = args.get('search', '').strip()
+    relevance = None
+    if search:
+        if args.get('fuzzy') == 'true':
+            query, relevance = fuzzy_search.search(query, search)
+        else:
+            query, relevance = search_index.search(query, search)
+    
+    # Price range
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    
+    # Brand filter
+    brand = args.get('brand')
+    if brand:
+        query = query.filter(Product.brand.ilike(f'%{brand}%'))
+    
+    # Stock filter
+    in_stock = args.get('in_stock')
+    if in_stock == 'true':
+        query = query.filter(Product.in_stock)
+    
+    # Featured filter
+    featured = args.get('featured')
+    if featured == 'true':
+        query = query.filter(Product.is_featured == True)
+    
+    return query, relevance
@@ -0,0 +1,102 @@
+"""
+FlaskMarket Enterprise - Pagination Helpers
+Keyset (cursor) pagination for list endpoints
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import abort, current_app
+from sqlalchemy import and_, or_, asc, desc, DateTime
+
+
+def cursor_requested(args):
+    """Cursor mode is opt-in: any ``cursor`` argument (even empty) enables it"""
+    return 'cursor' in args
+
+
+def encode_cursor(value, last_id):
+    """Encode the last row's sort value and id as an opaque token"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order_column):
+    """
+    Decode a cursor produced by encode_cursor
+    Aborts with 400 if the token is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if value is not None and isinstance(order_column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        abort(400, description='Invalid pagination cursor')
+
+
+class KeysetPage:
+    """One page of keyset pagination results"""
+
+    def __init__(self, items, per_page, next_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def to_dict(self):
+        data = {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'has_next': self.has_next
+        }
+        if self.total is not None:
+            data['total_items'] = self.total
+        return data
+
+
+def keyset_paginate(query, order_column, id_column, cursor=None, per_page=20,
+                    descending=True, include_total=False):
+    """
+    Seek pagination on (order_column, id_column)
+    Instead of OFFSET, each page filters past the last row of the previous
+    one, so page N costs the same as page 1. The total row count is only
+    computed when include_total is set.
+    """
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, order_column)
+        if descending:
+            query = query.filter(or_(
+                order_column < value,
+                and_(order_column == value, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                order_column > value,
+                and_(order_column == value, id_column > last_id)
+            ))
+
+    # Clamped here too, so no caller can ask for an empty or unbounded page
+    per_page = max(min(per_page, current_app.config['MAX_ITEMS_PER_PAGE']), 1)
+
+    direction = desc if descending else asc
+    rows = query.order_by(
+        direction(order_column), direction(id_column)
+    ).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, order_column.key), getattr(last, id_column.key))
+
+    return KeysetPage(items, per_page, next_cursor, total)
@@ -0,0 +1,98 @@
+"""
+FlaskMarket Enterprise - Bulk Serializers
+Serialize lists of models with a fixed number of grouped queries
+instead of one or more lazy loads per row
+"""
+
+from collections import defaultdict
+from app.extensions import db
+from app.models import Category, ProductImage
+from app.models.product import product_categories, product_field_names
+
+
+def serialize_categories(categories):
+    """
+    Flat category dicts; product counts are stored, so no extra queries
+    Nested output goes through serialize_category_tree.
+    """
+    return [category.to_dict() for category in categories]
+
+
+def serialize_category_tree(categories, root_id=None):
+    """
+    Nest a flat category list (e.g. from category_subtree) by parent_id
+    Returns the root dicts: the category ``root_id``, or every top-level
+    category. Each dict carries a recursive ``children`` list.
+    """
+    nodes = {c.id: dict(c.to_dict(), children=[]) for c in categories}
+
+    roots = []
+    for category in categories:
+        node = nodes[category.id]
+        if category.id == root_id:
+            roots.append(node)
+        elif category.parent_id in nodes:
+            nodes[category.parent_id]['children'].append(node)
+        elif root_id is None and category.parent_id is None:
+            roots.append(node)
+    return roots
+
+
+def serialize_products(products, include_details=False, fields=None):
+    """
+    Bulk equivalent of [p.to_dict(include_details, fields=fields) for p in products]
+    Categories and (with details) images are fetched in
+    one query each, regardless of how many products are passed, and only
+    when the output includes them
+    """
+    products = list(products)
+    if not products:
+        return []
+
+    product_ids = [p.id for p in products]
+    names = product_field_names(include_details, fields)
+
+    # Categories per product
+    categories = defaultdict(list)
+    if 'categories' in names:
+        category_rows = db.session.query(
+            product_categories.c.product_id, Category
+        ).join(
+            Category, Category.id == product_categories.c.category_id
+        ).filter(
+            product_categories.c.product_id.in_(product_ids)
+        ).order_by(Category.id).all()
+        for product_id, category in category_rows:
+            categories[product_id].append(category.to_dict())
+
+    # Gallery images
+    images = defaultdict(list)
+    if 'images' in names:
+        image_rows = ProductImage.query.filter(
+            ProductImage.product_id.in_(product_ids)
+        ).order_by(ProductImage.id).all()
+        for image in image_rows:
+            images[image.product_id].append(image.to_dict())
+
+    data = []
+    for product in products:
+        related = {'categories': categories[product.id], 'images': images[product.id]}
+        data.append(product.to_dict(include_details=include_details, related=related, fields=fields))
+    return data
+
+
+def serialize_cart_items(cart_items, fields=None):
+    """
+    Bulk equivalent of [item.to_dict() for item in cart_items]
+    ``fields`` limits the nested product data
+    """
+    cart_items = list(cart_items)
+    products = [item.product for item in cart_items if item.product]
+    product_data = {
+        product.id: data
+        for product, data in zip(products, serialize_products(products, fields=fields))
+    }
+    return [
+        item.to_dict(product_data=product_data.get(item.product_id))
+        for item in cart_items
+    ]
@@ -4,6 +4,7 @@ Run this file to start the development server
 """
 
 import os
+import click
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -24,7 +25,23 @@ with app.app_context():
         print('🌱 Seeding database...')
         from seed import seed_database
         seed_database()
+        from app.services import search_index
+        search_index.rebuild()
         print('✅ Database seeded successfully!')
+    
+    # Backfill the category closure table for databases created before it existed
+    from app.models.product import CategoryClosure
+    if CategoryClosure.query.first() is None and Category.query.first() is not None:
+        from app.services import rebuild_category_closure
+        rebuild_category_closure()
+    
+    # Catch category product counts up with any writes made outside the API
+    from app.services import refresh_category_counts
+    refresh_category_counts()
+    
+    # Warm the autocomplete index so the first keystrokes don't pay for it
+    from app.services import suggestions
+    suggestions.rebuild()
 
 
 @app.cli.command('init-db')
@@ -39,8 +56,10 @@ def init_db():
 def seed_db():
     """Seed the database with sample data."""
     from seed import seed_database
+    from app.services import search_index
     with app.app_context():
         seed_database()
+        search_index.rebuild()
         print('✅ Database seeded successfully!')
 
 
@@ -52,9 +71,91 @@ def reset_db():
         db.create_all()
         from seed import seed_database
         seed_database()
+        from app.services import search_index
+        search_index.rebuild()
         print('✅ Database reset and seeded successfully!')
 
 
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Rebuild the product full-text search index."""
+    from app.services import search_index
+    with app.app_context():
+        count = search_index.rebuild()
+        print(f'✅ Search index rebuilt ({count} products)')
+
+
+@app.cli.command('rebuild-category-closure')
+def rebuild_category_closure_command():
+    """Recompute the category hierarchy closure table from parent links."""
+    from app.services import rebuild_category_closure
+    with app.app_context():
+        count = rebuild_category_closure()
+        print(f'✅ Category closure rebuilt ({count} rows)')
+
+
+@app.cli.command('refresh-category-counts')
+def refresh_category_counts_command():
+    """Roll up active product counts per category (run periodically)."""
+    from app.services import refresh_category_counts
+    with app.app_context():
+        count = refresh_category_counts()
+        print(f'✅ Category product counts refreshed ({count} changed)')
+
+
+@app.cli.command('reconcile-ratings')
+def reconcile_ratings_command():
+    """Recompute denormalized product rating aggregates from reviews."""
+    from app.services import reconcile_ratings
+    with app.app_context():
+        count = reconcile_ratings()
+        print(f'✅ Rating aggregates reconciled ({count} products)')
+
+
+@app.cli.command('build-related')
+@click.option('--full', is_flag=True, help='Recompute from the first order instead of resuming.')
+def build_related_command(full):
+    """Fold new orders into the frequently-bought-together table."""
+    from app.services import build_related
+    with app.app_context():
+        count = build_related(full=full)
+        print(f'✅ Related products updated ({count} new baskets)')
+
+
+@app.cli.command('sweep-guest-carts')
+def sweep_guest_carts_command():
+    """Delete guest carts past GUEST_CART_TTL (run periodically)."""
+    from app.services import guest_carts
+    with app.app_context():
+        count = guest_carts.sweep()
+        print(f'✅ Expired guest carts removed ({count})')
+
+
+@app.cli.command('benchmark-pricing')
+@click.option('--repeat', default=200, show_default=True, help='Timed runs per basket size.')
+def benchmark_pricing_command(repeat):
+    """Time basket pricing (price lookup + single pass) for 1 to 500 lines."""
+    import timeit
+    from app.models import Product
+    from app.services import basket_prices, price_basket
+    with app.app_context():
+        product_ids = [product_id for (product_id,) in db.session.query(Product.id).order_by(Product.id)]
+        if not product_ids:
+            print('No products to price; seed the database first')
+            return
+        for size in (1, 10, 50, 100, 250, 500):
+            basket = [(product_ids[i % len(product_ids)], i % 5 + 1) for i in range(size)]
+
+            def run():
+                prices = basket_prices([product_id for product_id, _ in basket])
+                return price_basket(
+                    (product_id, prices[product_id], quantity) for product_id, quantity in basket
+                )
+
+            best = min(timeit.repeat(run, number=1, repeat=repeat))
+            print(f'{size:>4} lines: {best * 1000:.3f} ms')
+
+
 @app.shell_context_processor
 def make_shell_context():
     """Add models to shell context for easy debugging."""
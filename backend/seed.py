@@ -7,8 +7,9 @@ from datetime import datetime, timedelta
 from app import create_app
 from app.extensions import db
 from app.models.user import User, Address
-from app.models.product import Product, Category, ProductImage, Review
+from app.models.product import Product, Category, CategoryClosure, ProductImage, Review
 from app.models.order import Coupon
+from app.services import rebuild_category_closure, refresh_category_counts
 
 
 def seed_database():
@@ -22,6 +23,7 @@ def seed_database():
     # Clear the association table first
     db.session.execute(db.text('DELETE FROM product_categories'))
     db.session.query(Product).delete()
+    db.session.query(CategoryClosure).delete()
     db.session.query(Category).delete()
     db.session.query(Address).delete()
     db.session.query(Coupon).delete()
@@ -90,6 +92,7 @@ def seed_database():
         categories[slug] = category
 
     db.session.commit()
+    rebuild_category_closure()
     print('✅ Categories created')
 
     # Comprehensive Products Data
@@ -830,6 +833,8 @@ def seed_database():
     db.session.commit()
     print('✅ Product images created')
 
+    refresh_category_counts()
+
     print('\n✨ Database seeding completed successfully!')
     print('\n📋 Summary:')
     print(f'   - Users: {User.query.count()}')
@@ -41,6 +41,20 @@ const ProductsPage = () => {
     },
   })
 
+  // Price bounds for the current category/search (min/max inputs excluded)
+  const { data: priceStats } = useQuery({
+    queryKey: ['price-stats', { search, selectedCategory }],
+    queryFn: async () => {
+      const response = await productsAPI.getPriceStats({
+        search: search || undefined,
+        category: selectedCategory || undefined,
+      })
+      return response.data.data
+    },
+  })
+  const priceFloor = priceStats?.min != null ? Math.floor(priceStats.min) : undefined
+  const priceCeiling = priceStats?.max != null ? Math.ceil(priceStats.max) : undefined
+
   // Fetch categories for filter
   const { data: categoriesData } = useQuery({
     queryKey: ['categories'],
@@ -154,7 +168,9 @@ const ProductsPage = () => {
                 <div className="flex items-center gap-2">
                   <input
                     type="number"
-                    placeholder="Min"
+                    placeholder={priceFloor !== undefined ? `Min (${priceFloor})` : 'Min'}
+                    min={priceFloor}
+                    max={priceCeiling}
                     value={minPrice}
                     onChange={(e) => updateFilter('min_price', e.target.value)}
                     className="w-full px-3 py-2 border border-gray-300 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-primary-500"
@@ -162,7 +178,9 @@ const ProductsPage = () => {
                   <span className="text-gray-400">-</span>
                   <input
                     type="number"
-                    placeholder="Max"
+                    placeholder={priceCeiling !== undefined ? `Max (${priceCeiling})` : 'Max'}
+                    min={priceFloor}
+                    max={priceCeiling}
                     value={maxPrice}
                     onChange={(e) => updateFilter('max_price', e.target.value)}
                     className="w-full px-3 py-2 border border-gray-300 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-primary-500"
@@ -388,7 +406,9 @@ const ProductsPage = () => {
                   <div className="flex items-center gap-2">
                     <input
                       type="number"
-                      placeholder="Min"
+                      placeholder={priceFloor !== undefined ? `Min (${priceFloor})` : 'Min'}
+                      min={priceFloor}
+                      max={priceCeiling}
                       value={minPrice}
                       onChange={(e) => updateFilter('min_price', e.target.value)}
                       className="w-full px-3 py-2 border rounded-lg text-sm"
@@ -396,7 +416,9 @@ const ProductsPage = () => {
                     <span>-</span>
                     <input
                       type="number"
-                      placeholder="Max"
+                      placeholder={priceCeiling !== undefined ? `Max (${priceCeiling})` : 'Max'}
+                      min={priceFloor}
+                      max={priceCeiling}
                       value={maxPrice}
                       onChange={(e) => updateFilter('max_price', e.target.value)}
                       className="w-full px-3 py-2 border rounded-lg text-sm"
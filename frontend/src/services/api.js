@@ -23,6 +23,11 @@ api.interceptors.request.use(
         config.headers.Authorization = `Bearer ${state.accessToken}`
       }
     }
+    // Guest cart token, merged into the account cart on login
+    const cartToken = localStorage.getItem('cart-token')
+    if (cartToken) {
+      config.headers['X-Cart-Token'] = cartToken
+    }
     return config
   },
   (error) => {
@@ -32,7 +37,13 @@ api.interceptors.request.use(
 
 // Response interceptor
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const cartToken = response.headers['x-cart-token']
+    if (cartToken) {
+      localStorage.setItem('cart-token', cartToken)
+    }
+    return response
+  },
   async (error) => {
     const originalRequest = error.config
 
@@ -92,6 +103,7 @@ export const productsAPI = {
   getById: (id) => api.get(`/products/${id}`),
   getByCategory: (category, params) => api.get(`/products/category/${category}`, { params }),
   search: (query) => api.get('/products/search', { params: { q: query } }),
+  getPriceStats: (params) => api.get('/products/price-stats', { params }),
   getFeatured: () => api.get('/products/featured'),
   getReviews: (productId) => api.get(`/products/${productId}/reviews`),
   addReview: (productId, data) => api.post(`/products/${productId}/reviews`, data),
@@ -108,6 +120,7 @@ export const cartAPI = {
   updateItem: (productId, data) => api.put(`/cart/items/${productId}`, data),
   removeItem: (productId) => api.delete(`/cart/items/${productId}`),
   clear: () => api.delete('/cart'),
+  batch: (operations) => api.post('/cart/batch', { operations }),
 }
 
 export const ordersAPI = {